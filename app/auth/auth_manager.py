@@ -3,15 +3,29 @@ Authentication Manager - Sistema de autenticación para MSBot
 Maneja usuarios, roles y permisos de acceso
 """
 
+import os
 import json
+import asyncio
+import time
+import heapq
 import hashlib
+import tempfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set
-from enum import Enum
+from typing import Dict, List, Optional
+from enum import Enum, IntFlag
 from pathlib import Path
 
 from app.utils.logger import setup_logger
 
+# Logger a nivel de módulo: setup_logger se ejecuta una sola vez al importar,
+# no en cada construcción de AuthManager
+_LOG = setup_logger(__name__)
+
 class UserRole(Enum):
     """Roles de usuario disponibles"""
     ADMIN = "admin"
@@ -19,44 +33,50 @@ class UserRole(Enum):
     GUEST = "guest"
     BANNED = "banned"
 
-class Permission(Enum):
-    """Permisos disponibles en el sistema"""
-    USE_RAG = "use_rag"
-    USE_ECHO = "use_echo"
-    ADMIN_COMMANDS = "admin_commands"
-    VIEW_METRICS = "view_metrics"
-    MANAGE_USERS = "manage_users"
+class Permission(IntFlag):
+    """Permisos disponibles en el sistema (bits combinables en una máscara)"""
+    USE_RAG = 1 << 0
+    USE_ECHO = 1 << 1
+    ADMIN_COMMANDS = 1 << 2
+    VIEW_METRICS = 1 << 3
+    MANAGE_USERS = 1 << 4
 
 class AuthenticatedUser:
     """Representa un usuario autenticado"""
-    
-    def __init__(self, user_id: str, name: str, email: str, role: UserRole, permissions: Set[Permission]):
+
+    __slots__ = ("user_id", "name", "email", "role", "permissions", "last_activity", "session_count")
+
+    def __init__(self, user_id: str, name: str, email: str, role: UserRole, permissions: int):
         self.user_id = user_id
         self.name = name
         self.email = email
         self.role = role
         self.permissions = permissions
-        self.last_activity = datetime.now()
+        # Reloj monotónico: barato de leer y seguro para comparar intervalos.
+        # Solo se convierte a hora de pared al serializar (to_dict).
+        self.last_activity = time.monotonic()
         self.session_count = 0
-    
+
     def has_permission(self, permission: Permission) -> bool:
         """Verificar si el usuario tiene un permiso específico"""
-        return permission in self.permissions
-    
+        return bool(self.permissions & permission)
+
     def update_activity(self):
         """Actualizar timestamp de última actividad"""
-        self.last_activity = datetime.now()
+        self.last_activity = time.monotonic()
         self.session_count += 1
     
     def to_dict(self) -> Dict:
         """Convertir usuario a diccionario"""
+        # Reconstruir la hora de pared a partir del delta monotónico
+        last_activity = datetime.now() - timedelta(seconds=time.monotonic() - self.last_activity)
         return {
             "user_id": self.user_id,
             "name": self.name,
             "email": self.email,
             "role": self.role.value,
-            "permissions": [p.value for p in self.permissions],
-            "last_activity": self.last_activity.isoformat(),
+            "permissions": [p.name.lower() for p in Permission if self.permissions & p],
+            "last_activity": last_activity.isoformat(),
             "session_count": self.session_count
         }
 
@@ -72,33 +92,54 @@ class AuthManager:
     """
     
     def __init__(self, config_file: str = "auth_config.json"):
-        self.logger = setup_logger(__name__)
+        self.logger = _LOG
         self.config_file = Path(config_file)
         
         # Usuarios autenticados en sesión actual
         self.authenticated_users: Dict[str, AuthenticatedUser] = {}
-        
+
+        # Min-heap (last_activity, user_id) con borrado perezoso: las
+        # entradas obsoletas se descartan al hacer pop, y la limpieza de
+        # sesiones cuesta O(k log N) en lugar de recorrer todas
+        self._activity_heap: List[tuple] = []
+
         # Configuración de usuarios autorizados
         self.authorized_users: Dict[str, Dict] = {}
-        
-        # Roles y sus permisos por defecto
+
+        # Índice plano para el camino caliente de autenticación:
+        # membresía O(1) sobre un frozenset y un tuple por usuario
+        # (name, email, role_enum, perm_mask) en lugar del dict anidado
+        self._authorized_ids: frozenset = frozenset()
+        self._user_records: Dict[str, tuple] = {}
+
+        # Escritura diferida: las mutaciones marcan la config como sucia
+        # y flush() agrupa varias operaciones en una sola escritura a disco
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._flush_interval = 5.0  # segundos mínimos entre escrituras
+        # Timer de borde de salida: un flush diferido programa una
+        # escritura al vencer el intervalo, para que el estado sucio
+        # nunca espere a la siguiente mutación o al shutdown
+        self._flush_handle = None
+
+        # Roles y sus máscaras de permisos por defecto. Son ints inmutables:
+        # cada usuario comparte la misma máscara sin copias por login, y el
+        # índice de usuarios (_user_records) la cachea por registro
         self.role_permissions = {
-            UserRole.ADMIN: {
-                Permission.USE_RAG,
-                Permission.USE_ECHO,
-                Permission.ADMIN_COMMANDS,
-                Permission.VIEW_METRICS,
-                Permission.MANAGE_USERS
-            },
-            UserRole.USER: {
-                Permission.USE_RAG,
-                Permission.USE_ECHO,
-                Permission.VIEW_METRICS
-            },
-            UserRole.GUEST: {
-                Permission.USE_ECHO
-            },
-            UserRole.BANNED: set()
+            UserRole.ADMIN: int(
+                Permission.USE_RAG
+                | Permission.USE_ECHO
+                | Permission.ADMIN_COMMANDS
+                | Permission.VIEW_METRICS
+                | Permission.MANAGE_USERS
+            ),
+            UserRole.USER: int(
+                Permission.USE_RAG
+                | Permission.USE_ECHO
+                | Permission.VIEW_METRICS
+            ),
+            UserRole.GUEST: int(Permission.USE_ECHO),
+            UserRole.BANNED: 0
         }
         
         # Cargar configuración
@@ -110,16 +151,20 @@ class AuthManager:
         """Cargar configuración de usuarios desde archivo"""
         try:
             if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    self.authorized_users = config_data.get("authorized_users", {})
-                    self.logger.info(f"Loaded {len(self.authorized_users)} authorized users")
+                raw = self.config_file.read_bytes()
+                config_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                self.authorized_users = config_data.get("authorized_users", {})
+                self._resolve_role_enums()
+                self.logger.info(f"Loaded {len(self.authorized_users)} authorized users")
             else:
-                # Crear configuración por defecto
+                # Crear configuración por defecto (solo si no existe el
+                # archivo: nunca sobreescribir una config que no se pudo
+                # leer — eso destruiría los usuarios en disco)
                 self._create_default_config()
         except Exception as e:
             self.logger.error(f"Error loading auth config: {e}")
-            self._create_default_config()
+            self.authorized_users = {}
+            self._rebuild_user_index()
     
     def _create_default_config(self):
         """Crear configuración por defecto"""
@@ -142,23 +187,147 @@ class AuthManager:
         else:
             self.authorized_users = {}
         
-        self._save_config()
+        self._resolve_role_enums()
+        self._save_config_sync()
         self.logger.info("Created default auth configuration")
-    
-    def _save_config(self):
-        """Guardar configuración en archivo"""
+
+    def _resolve_role_enums(self):
+        """Pre-resolver el rol de cada usuario a su instancia UserRole
+
+        Evita construir el Enum desde el string en cada autenticación.
+        La instancia se guarda bajo la clave privada `_role_enum`, que
+        se excluye al persistir la configuración.
+
+        Cada registro se resuelve por separado: un rol inválido solo
+        invalida a ese usuario (queda fuera del índice pero se conserva
+        en disco), nunca a la configuración completa.
+        """
+        for user_id, user_config in self.authorized_users.items():
+            try:
+                user_config["_role_enum"] = UserRole(user_config["role"])
+            except (KeyError, ValueError):
+                user_config.pop("_role_enum", None)
+                self.logger.error(
+                    f"Skipping user {user_id}: invalid role {user_config.get('role')!r}"
+                )
+        self._rebuild_user_index()
+
+    def _rebuild_user_index(self):
+        """Reconstruir el índice plano usado por authenticate_user
+
+        Los registros sin `_role_enum` (rol inválido al cargar) quedan
+        fuera del índice: no autentican, pero siguen persistiéndose.
+        """
+        self._user_records = {
+            user_id: (
+                user_config.get("name", "Usuario"),
+                user_config.get("email", ""),
+                user_config["_role_enum"],
+                self.role_permissions.get(user_config["_role_enum"], 0)
+            )
+            for user_id, user_config in self.authorized_users.items()
+            if "_role_enum" in user_config
+        }
+        self._authorized_ids = frozenset(self._user_records)
+
+    def _save_config_sync(self):
+        """Guardar configuración en archivo (escritura atómica, sin claves privadas)
+
+        Versión bloqueante: usarla solo desde contexto síncrono. Desde
+        código async, preferir _save_config_async / flush_async para no
+        detener el event loop durante la escritura a disco.
+        """
         try:
             config_data = {
-                "authorized_users": self.authorized_users,
+                "authorized_users": {
+                    user_id: {k: v for k, v in user_data.items() if not k.startswith("_")}
+                    for user_id, user_data in self.authorized_users.items()
+                },
                 "last_updated": datetime.now().isoformat()
             }
-            
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
-                
+
+            if orjson is not None:
+                payload = orjson.dumps(config_data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(config_data, indent=2, ensure_ascii=False).encode('utf-8')
+
+            # Escribir a un temporal y renombrar: nunca se observa un archivo parcial
+            with tempfile.NamedTemporaryFile(
+                mode='wb', dir=self.config_file.parent,
+                prefix=self.config_file.name, suffix='.tmp', delete=False
+            ) as f:
+                f.write(payload)
+                tmp_path = f.name
+            os.replace(tmp_path, self.config_file)
+
+            self._dirty = False
+            self._last_flush = time.monotonic()
             self.logger.info("Auth configuration saved")
         except Exception as e:
             self.logger.error(f"Error saving auth config: {e}")
+
+    def _mark_dirty(self):
+        """Marcar la configuración como pendiente de guardado
+
+        No escribe: las mutaciones llegan desde comandos admin async,
+        que persisten con flush_async() sin bloquear el event loop.
+        El timer diferido garantiza la escritura dentro del intervalo
+        y el shutdown/atexit fuerza el volcado de lo que quede.
+        """
+        self._dirty = True
+        self._schedule_trailing_flush()
+
+    def flush(self, force: bool = False):
+        """
+        Persistir la configuración si hay cambios pendientes
+
+        Agrupa mutaciones consecutivas: escribe como máximo una vez por
+        intervalo, salvo que se fuerce (shutdown, import masivo).
+
+        Args:
+            force: Escribir inmediatamente aunque no haya pasado el intervalo
+        """
+        if not self._dirty:
+            return
+        if force or (time.monotonic() - self._last_flush) >= self._flush_interval:
+            self._save_config_sync()
+        else:
+            self._schedule_trailing_flush()
+
+    def _schedule_trailing_flush(self):
+        """Programar una escritura diferida al vencer el intervalo
+
+        Sin esto, un flush diferido dentro de la ventana de debounce
+        solo se reintentaría en la siguiente mutación o en el shutdown,
+        y un crash intermedio perdería el cambio.
+        """
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sin event loop (arranque, atexit): no hay dónde programar;
+            # el flush forzado de shutdown/atexit cubre este camino
+            return
+        self._flush_handle = loop.call_later(self._flush_interval, self._trailing_flush)
+
+    def _trailing_flush(self):
+        """Callback del timer: volcar lo pendiente si sigue sucio"""
+        self._flush_handle = None
+        self.flush()
+
+    async def _save_config_async(self):
+        """Guardar configuración sin bloquear el event loop"""
+        await asyncio.to_thread(self._save_config_sync)
+
+    async def flush_async(self, force: bool = False):
+        """Variante async de flush() para llamadas desde handlers"""
+        if not self._dirty:
+            return
+        if force or (time.monotonic() - self._last_flush) >= self._flush_interval:
+            await self._save_config_async()
+        else:
+            self._schedule_trailing_flush()
     
     def authenticate_user(self, user_id: str, user_name: str = None, user_email: str = None) -> Optional[AuthenticatedUser]:
         """
@@ -174,35 +343,38 @@ class AuthManager:
         """
         
         # Verificar si el usuario está autorizado
-        if user_id not in self.authorized_users:
+        if user_id not in self._authorized_ids:
             self.logger.warning(f"Unauthorized access attempt by user {user_id} ({user_name})")
             return None
-        
-        # Obtener configuración del usuario
-        user_config = self.authorized_users[user_id]
-        role = UserRole(user_config["role"])
-        
-        # Verificar si está baneado
-        if role == UserRole.BANNED:
+
+        # Registro plano pre-construido: un solo desempaquetado de tuple
+        name, email, role, permissions = self._user_records[user_id]
+
+        # Rechazar usuarios baneados antes de construir nada: este camino
+        # puede ser spameado y no debe costar más que la comparación
+        if role is UserRole.BANNED:
             self.logger.warning(f"Banned user attempted access: {user_id}")
             return None
-        
-        # Obtener permisos basados en el rol
-        permissions = self.role_permissions.get(role, set())
-        
+
         # Crear usuario autenticado
         auth_user = AuthenticatedUser(
             user_id=user_id,
-            name=user_name or user_config.get("name", "Usuario"),
-            email=user_email or user_config.get("email", ""),
+            name=user_name or name,
+            email=user_email or email,
             role=role,
             permissions=permissions
         )
         
-        # Guardar en sesión
+        # Guardar en sesión (la actividad la registra el middleware una
+        # vez por mensaje). El heap lleva UNA entrada por sesión: las
+        # reautenticaciones solo refrescan el objeto, y la limpieza
+        # re-encola comparando contra el last_activity real — sin esto
+        # el heap crecería un nodo por mensaje para siempre
+        is_new_session = user_id not in self.authenticated_users
         self.authenticated_users[user_id] = auth_user
-        auth_user.update_activity()
-        
+        if is_new_session:
+            heapq.heappush(self._activity_heap, (auth_user.last_activity, user_id))
+
         self.logger.info(f"User authenticated: {user_id} ({auth_user.name}) as {role.value}")
         return auth_user
     
@@ -213,26 +385,27 @@ class AuthManager:
     def is_user_authorized(self, user_id: str, permission: Permission = None) -> bool:
         """
         Verificar si un usuario está autorizado
-        
+
+        Consulta pura: no modifica el estado de la sesión. El registro
+        de actividad ocurre una sola vez por mensaje en el middleware
+        (AuthMiddleware.process_message).
+
         Args:
             user_id: ID del usuario
             permission: Permiso específico a verificar (opcional)
-            
+
         Returns:
             True si está autorizado
         """
-        
+
         auth_user = self.get_authenticated_user(user_id)
-        
+
         if not auth_user:
             return False
-        
+
         if permission and not auth_user.has_permission(permission):
             return False
-        
-        # Actualizar actividad
-        auth_user.update_activity()
-        
+
         return True
     
     def add_authorized_user(self, user_id: str, name: str, email: str, role: UserRole, added_by: str = "admin") -> bool:
@@ -255,11 +428,13 @@ class AuthManager:
                 "name": name,
                 "email": email,
                 "role": role.value,
+                "_role_enum": role,
                 "added_date": datetime.now().isoformat(),
                 "added_by": added_by
             }
-            
-            self._save_config()
+
+            self._rebuild_user_index()
+            self._mark_dirty()
             self.logger.info(f"Added authorized user: {user_id} ({name}) as {role.value}")
             return True
             
@@ -287,8 +462,9 @@ class AuthManager:
                 # Remover de sesiones activas
                 if user_id in self.authenticated_users:
                     del self.authenticated_users[user_id]
-                
-                self._save_config()
+
+                self._rebuild_user_index()
+                self._mark_dirty()
                 self.logger.info(f"Removed user: {user_id} ({user_name}) by {removed_by}")
                 return True
             else:
@@ -319,6 +495,7 @@ class AuthManager:
             
             old_role = self.authorized_users[user_id]["role"]
             self.authorized_users[user_id]["role"] = new_role.value
+            self.authorized_users[user_id]["_role_enum"] = new_role
             self.authorized_users[user_id]["last_updated"] = datetime.now().isoformat()
             self.authorized_users[user_id]["updated_by"] = updated_by
             
@@ -326,9 +503,10 @@ class AuthManager:
             if user_id in self.authenticated_users:
                 auth_user = self.authenticated_users[user_id]
                 auth_user.role = new_role
-                auth_user.permissions = self.role_permissions.get(new_role, set())
-            
-            self._save_config()
+                auth_user.permissions = self.role_permissions.get(new_role, 0)
+
+            self._rebuild_user_index()
+            self._mark_dirty()
             self.logger.info(f"Updated user {user_id} role from {old_role} to {new_role.value}")
             return True
             
@@ -356,25 +534,49 @@ class AuthManager:
         }
     
     def cleanup_inactive_sessions(self, timeout_hours: int = 24):
-        """Limpiar sesiones inactivas"""
-        
-        cutoff_time = datetime.now() - timedelta(hours=timeout_hours)
-        inactive_users = []
-        
-        for user_id, auth_user in self.authenticated_users.items():
+        """Limpiar sesiones inactivas
+
+        Recorre el heap de actividad solo hasta la primera entrada dentro
+        del umbral: O(k log N) con k sesiones expiradas. Las entradas
+        obsoletas (el usuario volvió a estar activo o ya salió de sesión)
+        se descartan perezosamente.
+        """
+
+        cutoff_time = time.monotonic() - timeout_hours * 3600
+        removed = 0
+        requeued = set()
+
+        while self._activity_heap and self._activity_heap[0][0] < cutoff_time:
+            _, user_id = heapq.heappop(self._activity_heap)
+            auth_user = self.authenticated_users.get(user_id)
+
+            if auth_user is None:
+                # Sesión ya eliminada: entrada obsoleta
+                continue
+
             if auth_user.last_activity < cutoff_time:
-                inactive_users.append(user_id)
-        
-        for user_id in inactive_users:
-            del self.authenticated_users[user_id]
-            self.logger.info(f"Cleaned up inactive session for user {user_id}")
-        
-        return len(inactive_users)
+                del self.authenticated_users[user_id]
+                removed += 1
+                self.logger.info(f"Cleaned up inactive session for user {user_id}")
+            elif user_id not in requeued:
+                # Entrada obsoleta de un usuario aún activo: re-encolar
+                # su timestamp real, como máximo una vez por pasada para
+                # que duplicados heredados no re-inflen el heap
+                requeued.add(user_id)
+                heapq.heappush(self._activity_heap, (auth_user.last_activity, user_id))
+
+        # Punto periódico conveniente para volcar cambios pendientes
+        self.flush()
+
+        return removed
     
     def export_users(self) -> Dict:
-        """Exportar configuración de usuarios para backup"""
+        """Exportar configuración de usuarios para backup (sin claves privadas)"""
         return {
-            "authorized_users": self.authorized_users,
+            "authorized_users": {
+                user_id: {k: v for k, v in user_data.items() if not k.startswith("_")}
+                for user_id, user_data in self.authorized_users.items()
+            },
             "export_date": datetime.now().isoformat(),
             "total_users": len(self.authorized_users)
         }
@@ -384,7 +586,9 @@ class AuthManager:
         try:
             if "authorized_users" in user_data:
                 self.authorized_users.update(user_data["authorized_users"])
-                self._save_config()
+                self._resolve_role_enums()
+                self._dirty = True
+                self.flush(force=True)
                 self.logger.info(f"Imported {len(user_data['authorized_users'])} users by {imported_by}")
                 return True
             return False
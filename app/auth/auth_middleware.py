@@ -9,24 +9,12 @@ from botbuilder.core import TurnContext
 from app.auth.auth_manager import AuthManager, Permission
 from app.utils.logger import setup_logger
 
-class AuthMiddleware:
-    """
-    Middleware de autenticación que se ejecuta antes de procesar mensajes
-    
-    Funcionalidades:
-    - Verificación automática de usuarios
-    - Control de acceso por permisos
-    - Mensajes de error personalizados
-    - Logging de intentos de acceso
-    """
-    
-    def __init__(self, auth_manager: AuthManager):
-        self.auth_manager = auth_manager
-        self.logger = setup_logger(__name__)
-        
-        # Mensajes de error personalizados
-        self.error_messages = {
-            "unauthorized": """
+# Logger compartido del módulo (se configura una sola vez al importar)
+_LOG = setup_logger(__name__)
+
+# Plantillas de error congeladas a nivel de módulo: el .strip() corre
+# exactamente una vez al importar, no en cada construcción del middleware
+_ERR_UNAUTHORIZED = """
 🚫 **Acceso No Autorizado**
 
 Lo siento, no tienes permisos para usar este bot.
@@ -36,9 +24,9 @@ Para obtener acceso, contacta a tu administrador con tu ID de usuario:
 
 ---
 📞 **Soporte:** Contacta al administrador del sistema
-            """.strip(),
-            
-            "insufficient_permissions": """
+""".strip()
+
+_ERR_INSUFFICIENT_PERMISSIONS = """
 ⚠️ **Permisos Insuficientes**
 
 No tienes los permisos necesarios para realizar esta acción.
@@ -48,37 +36,80 @@ No tienes los permisos necesarios para realizar esta acción.
 
 ---
 📞 Para solicitar permisos adicionales, contacta a tu administrador
-            """.strip(),
-            
-            "banned": """
+""".strip()
+
+_ERR_BANNED = """
 🚫 **Acceso Denegado**
 
 Tu cuenta ha sido suspendida del uso de este bot.
 
 ---
 📞 Para más información, contacta al administrador del sistema
-            """.strip()
-        }
+""".strip()
+
+class AuthMiddleware:
+    """
+    Middleware de autenticación que se ejecuta antes de procesar mensajes
     
+    Funcionalidades:
+    - Verificación automática de usuarios
+    - Control de acceso por permisos
+    - Mensajes de error personalizados
+    - Logging de intentos de acceso
+    """
+    
+    def __init__(self, auth_manager: AuthManager):
+        self.auth_manager = auth_manager
+        self.logger = _LOG
+        
+        # Mensajes de error personalizados (constantes de módulo)
+        self.error_messages = {
+            "unauthorized": _ERR_UNAUTHORIZED,
+            "insufficient_permissions": _ERR_INSUFFICIENT_PERMISSIONS,
+            "banned": _ERR_BANNED
+        }
+
+        # Plantilla "unauthorized" pre-partida en el marcador {user_id}:
+        # concatenar prefijo + id + sufijo es más barato que .format()
+        self._unauth_prefix, _, self._unauth_suffix = (
+            self.error_messages["unauthorized"].partition("{user_id}")
+        )
+
+        # Mensajes de permisos insuficientes ya renderizados por (rol, permiso)
+        self._perm_error_cache: dict = {}
+
     async def process_message(self, turn_context: TurnContext, required_permission: Permission = None) -> tuple[bool, Optional[str]]:
         """
         Procesar mensaje y verificar autenticación/autorización
-        
+
+        Wrapper async por compatibilidad de API: todo el trabajo es
+        síncrono (lookups en memoria), ver _process_message_sync.
+
         Args:
             turn_context: Contexto del mensaje de Teams
             required_permission: Permiso requerido para la acción (opcional)
-            
+
         Returns:
             Tuple (is_authorized, error_message)
             - is_authorized: True si el usuario está autorizado
             - error_message: Mensaje de error si no está autorizado (None si está autorizado)
         """
-        
+        return self._process_message_sync(turn_context, required_permission)
+
+    def _process_message_sync(self, turn_context: TurnContext, required_permission: Permission = None) -> tuple[bool, Optional[str]]:
+        """
+        Verificar autenticación/autorización sin salto de corrutina
+
+        Punto único donde se registra la actividad del usuario: se llama
+        update_activity exactamente una vez por mensaje autenticado.
+        """
+
         try:
-            # Extraer información del usuario
-            user_id = turn_context.activity.from_property.id
-            user_name = turn_context.activity.from_property.name
-            user_email = getattr(turn_context.activity.from_property, 'email', None)
+            # Extraer información del usuario (un solo acceso a from_property)
+            fp = turn_context.activity.from_property
+            user_id = fp.id
+            user_name = fp.name
+            user_email = vars(fp).get('email') if hasattr(fp, '__dict__') else getattr(fp, 'email', None)
             
             self.logger.info(f"Processing auth for user {user_id} ({user_name})")
             
@@ -87,10 +118,13 @@ Tu cuenta ha sido suspendida del uso de este bot.
             
             if not auth_user:
                 # Usuario no autorizado
-                error_msg = self.error_messages["unauthorized"].format(user_id=user_id)
+                error_msg = f"{self._unauth_prefix}{user_id}{self._unauth_suffix}"
                 self.logger.warning(f"Unauthorized access attempt: {user_id} ({user_name})")
                 return False, error_msg
-            
+
+            # Registrar actividad una sola vez por mensaje
+            auth_user.update_activity()
+
             # Verificar si está baneado
             if auth_user.role.value == "banned":
                 error_msg = self.error_messages["banned"]
@@ -99,11 +133,15 @@ Tu cuenta ha sido suspendida del uso de este bot.
             
             # Verificar permisos específicos si se requieren
             if required_permission and not auth_user.has_permission(required_permission):
-                error_msg = self.error_messages["insufficient_permissions"].format(
-                    role=auth_user.role.value,
-                    permission=required_permission.value
-                )
-                self.logger.warning(f"Insufficient permissions for {user_id}: required {required_permission.value}")
+                cache_key = (auth_user.role.value, required_permission.name)
+                error_msg = self._perm_error_cache.get(cache_key)
+                if error_msg is None:
+                    error_msg = self.error_messages["insufficient_permissions"].format(
+                        role=auth_user.role.value,
+                        permission=required_permission.name.lower()
+                    )
+                    self._perm_error_cache[cache_key] = error_msg
+                self.logger.warning(f"Insufficient permissions for {user_id}: required {required_permission.name.lower()}")
                 return False, error_msg
             
             # Usuario autorizado
@@ -127,8 +165,8 @@ Tu cuenta ha sido suspendida del uso de este bot.
         """
         
         try:
-            user_id = turn_context.activity.from_property.id
-            auth_user = self.auth_manager.get_authenticated_user(user_id)
+            fp = turn_context.activity.from_property
+            auth_user = self.auth_manager.get_authenticated_user(fp.id)
             
             if auth_user:
                 return auth_user.to_dict()
@@ -173,7 +211,7 @@ class AuthenticatedHandler:
     def __init__(self, auth_middleware: AuthMiddleware, required_permission: Permission = None):
         self.auth_middleware = auth_middleware
         self.required_permission = required_permission
-        self.logger = setup_logger(__name__)
+        self.logger = _LOG
     
     async def handle_with_auth(self, message: str, turn_context: TurnContext) -> Optional[str]:
         """
@@ -187,12 +225,12 @@ class AuthenticatedHandler:
             Respuesta del handler o mensaje de error
         """
         
-        # Verificar autenticación
-        is_authorized, error_msg = await self.auth_middleware.process_message(
-            turn_context, 
+        # Verificar autenticación (camino síncrono: sin corrutina extra)
+        is_authorized, error_msg = self.auth_middleware._process_message_sync(
+            turn_context,
             self.required_permission
         )
-        
+
         if not is_authorized:
             return error_msg
         
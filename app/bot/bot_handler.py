@@ -4,9 +4,16 @@ Handles Microsoft Teams activities and routes them to appropriate handlers
 Now includes authentication and authorization
 """
 
+import copy
 import json
 import time
+import asyncio
 from typing import Dict, Any, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from aiohttp import web
 from botbuilder.core import (
     TurnContext, 
@@ -21,28 +28,101 @@ from app.config.settings import get_settings
 from app.utils.logger import setup_logger, log_teams_activity, log_handler_execution
 from app.bot.handlers.handler_registry import HandlerRegistry
 from app.bot.handlers.authenticated_echo_handler import AuthenticatedEchoHandler
-from app.bot.handlers.admin_handler import AdminHandler
+from app.bot.handlers.admin_handler import AdminHandler, ADMIN_PREFIX
 from app.auth.auth_manager import AuthManager
 from app.auth.auth_middleware import AuthMiddleware
 
+# Logger compartido del módulo (se configura una sola vez al importar)
+_LOG = setup_logger(__name__)
+
+# Deserializador de Activity pre-resuelto: evita construir un Activity
+# temporal por turno solo para llamar a su método deserialize
+_ACTIVITY_DESERIALIZE = Activity().deserialize
+
+# Campos del payload que el bot realmente usa. Los activities de Teams
+# pueden traer attachments/channelData enormes; proyectar a este
+# subconjunto antes de deserializar evita convertir todo eso en objetos
+_ACTIVITY_KEYS = (
+    "type", "id", "timestamp", "localTimestamp", "serviceUrl", "channelId",
+    "from", "recipient", "conversation", "text", "textFormat", "locale",
+    "replyToId", "membersAdded", "membersRemoved", "value"
+)
+
+# Cuerpo de error serializado una sola vez al importar: el payload es
+# estático y orjson emite bytes que FastAPI acepta sin re-encode
+_ERR_INTERNAL_BODY = (
+    orjson.dumps({"error": "Internal server error"})
+    if orjson is not None
+    else json.dumps({"error": "Internal server error"}).encode()
+)
+
+_ERR_MALFORMED_BODY = (
+    orjson.dumps({"error": "Malformed activity payload"})
+    if orjson is not None
+    else json.dumps({"error": "Malformed activity payload"}).encode()
+)
+
+# Activities plantilla para los textos fijos de error/fallback: se
+# construyen una vez y se envía un copy.copy por turno (el adapter
+# muta la activity al aplicar la conversation reference, así que no
+# se puede reenviar el mismo objeto entre turnos concurrentes)
+_ERR_TURN_ACTIVITY = MessageFactory.text(
+    "Lo siento, ocurrió un error procesando tu mensaje."
+)
+_NO_HANDLER_ACTIVITY = MessageFactory.text(
+    "Lo siento, no hay handlers disponibles para procesar tu mensaje."
+)
+_ERR_HANDLER_ACTIVITY = MessageFactory.text(
+    "Ocurrió un error procesando tu mensaje. Por favor intenta de nuevo."
+)
+
+# Mensaje de bienvenida pre-construido una vez al importar
+_WELCOME_MESSAGE = (
+    "¡Hola! Soy MSBot, tu interfaz autenticada para sistemas RAG.\n\n"
+    "🔐 **Sistema de Autenticación Activo**\n"
+    "Solo usuarios autorizados pueden usar este bot.\n\n"
+    "💬 Envíame un mensaje para verificar tu acceso.\n"
+    "👑 Los administradores pueden usar comandos `/admin help`"
+)
+
 class MSBotHandler(ActivityHandler):
     """
     Main bot handler that processes Teams activities with authentication
     Routes messages to appropriate modular handlers after auth verification
     """
-    
+
+    # Slot descriptors para los atributos tocados en cada turno; la base
+    # ActivityHandler no declara __slots__, así que el __dict__ sigue
+    # existiendo pero queda vacío y el acceso va por descriptor
+    __slots__ = (
+        "settings", "logger", "_app_id", "_app_password",
+        "auth_manager", "auth_middleware", "adapter",
+        "handler_registry", "_admin_handler", "_default_handler",
+        "handlers_changed_hook"
+    )
+
     def __init__(self, auth_manager: AuthManager = None, auth_middleware: AuthMiddleware = None):
         super().__init__()
         self.settings = get_settings()
-        self.logger = setup_logger(__name__)
-        
+        self.logger = _LOG
+
+        # Credenciales usadas por el adapter, sin cadenas de atributos
+        # settings.* en los caminos por request
+        self._app_id = self.settings.microsoft_app_id
+        self._app_password = self.settings.microsoft_app_password
+
         # Initialize authentication components
         self.auth_manager = auth_manager or AuthManager()
         self.auth_middleware = auth_middleware or AuthMiddleware(self.auth_manager)
         
-        # Initialize Bot Framework Adapter
+        # Initialize Bot Framework Adapter (una sola instancia por proceso:
+        # su conector HTTP interno se reutiliza entre turnos con keep-alive)
         self.adapter = self._create_adapter()
-        
+
+        # Callback opcional notificado cuando cambia el set de handlers
+        # (usado por la app para invalidar payloads de estado cacheados)
+        self.handlers_changed_hook = None
+
         # Initialize handler registry
         self.handler_registry = HandlerRegistry()
         
@@ -56,8 +136,8 @@ class MSBotHandler(ActivityHandler):
         
         # Bot Framework Adapter Settings
         settings = BotFrameworkAdapterSettings(
-            app_id=self.settings.microsoft_app_id,
-            app_password=self.settings.microsoft_app_password
+            app_id=self._app_id,
+            app_password=self._app_password
         )
         
         # Create adapter
@@ -65,10 +145,8 @@ class MSBotHandler(ActivityHandler):
         
         # Error handler
         async def on_error(context: TurnContext, error: Exception):
-            self.logger.error(f"Bot error: {str(error)}")
-            await context.send_activity(
-                MessageFactory.text("Lo siento, ocurrió un error procesando tu mensaje.")
-            )
+            self.logger.error("Bot error: %s", error)
+            await context.send_activity(copy.copy(_ERR_TURN_ACTIVITY))
         
         adapter.on_turn_error = on_error
         
@@ -80,11 +158,17 @@ class MSBotHandler(ActivityHandler):
         # Register Authenticated Echo Handler as default
         auth_echo_handler = AuthenticatedEchoHandler(self.auth_middleware)
         self.handler_registry.register_handler("auth_echo", auth_echo_handler, is_default=True)
-        
+
         # Register Admin Handler
         admin_handler = AdminHandler(self.auth_manager, self.auth_middleware)
         self.handler_registry.register_handler("admin", admin_handler)
-        
+
+        # Cachear los handlers del routing como atributos: la decisión por
+        # mensaje es una lectura de atributo, sin pasar por el registry.
+        # add_handler(..., is_default=True) reemplaza _default_handler
+        self._admin_handler = admin_handler
+        self._default_handler = auth_echo_handler
+
         self.logger.info("Authentication-enabled handlers registered")
     
     async def process_activity(self, body: bytes, auth_header: str) -> Dict[str, Any]:
@@ -92,7 +176,7 @@ class MSBotHandler(ActivityHandler):
         Process incoming activity from Teams
         
         Args:
-            body: Request body from Teams
+            body: Request body from Teams (parsed as bytes, no intermediate str copy)
             auth_header: Authorization header
             
         Returns:
@@ -100,10 +184,37 @@ class MSBotHandler(ActivityHandler):
         """
         
         try:
-            # Parse activity from request body
-            activity_data = json.loads(body.decode('utf-8'))
-            activity = Activity().deserialize(activity_data)
-            
+            # Parse activity from request body (orjson takes bytes directly).
+            # JSON inválido corta aquí con 400, sin llegar al 500 genérico
+            try:
+                activity_data = orjson.loads(body) if orjson is not None else json.loads(body)
+            except ValueError:
+                self.logger.warning("Malformed JSON in activity body")
+                return {
+                    "status": 400,
+                    "body": _ERR_MALFORMED_BODY,
+                    "headers": {"Content-Type": "application/json"}
+                }
+
+            # Fast path: el bot solo maneja mensajes y altas de miembros.
+            # Para cualquier otro tipo se responde 202 sin pagar la
+            # deserialización completa del Activity ni el pipeline del adapter
+            activity_type = activity_data.get("type")
+            if activity_type not in ("message", "conversationUpdate"):
+                self.logger.debug("Skipping unhandled activity type: %s", activity_type)
+                return {
+                    "status": 202,
+                    "body": "",
+                    "headers": {"Content-Type": "application/json"}
+                }
+
+            # Proyección estrecha: solo los campos usados llegan al
+            # deserializador; el dict completo queda libre de inmediato
+            slim = {k: activity_data[k] for k in _ACTIVITY_KEYS if k in activity_data}
+            activity_data = None
+
+            activity = _ACTIVITY_DESERIALIZE(slim)
+
             log_teams_activity(
                 self.logger, 
                 activity.type, 
@@ -124,10 +235,10 @@ class MSBotHandler(ActivityHandler):
             }
             
         except Exception as e:
-            self.logger.error(f"Error processing activity: {str(e)}")
+            self.logger.error("Error processing activity: %s", e)
             return {
                 "status": 500,
-                "body": json.dumps({"error": "Internal server error"}),
+                "body": _ERR_INTERNAL_BODY,
                 "headers": {"Content-Type": "application/json"}
             }
     
@@ -137,14 +248,19 @@ class MSBotHandler(ActivityHandler):
         Routes messages to appropriate handlers after auth check
         """
         
-        start_time = time.time()
-        
+        # monotonic_ns: entero C-level, sin alocación de float ni saltos
+        # de reloj; se convierte a segundos solo al loggear
+        start_ns = time.monotonic_ns()
+
         try:
-            user_message = turn_context.activity.text
-            user_id = turn_context.activity.from_property.id
-            user_name = turn_context.activity.from_property.name
+            # Resolver las cadenas de atributos del SDK una sola vez
+            activity = turn_context.activity
+            fp = activity.from_property
+            user_message = activity.text
+            user_id = fp.id
+            user_name = fp.name
             
-            self.logger.info(f"Processing message from user {user_id} ({user_name}): {user_message}")
+            self.logger.info("Processing message from user %s (%s): %s", user_id, user_name, user_message)
             
             # Get appropriate handler based on message content
             handler = self._route_message_to_handler(user_message, turn_context)
@@ -153,27 +269,32 @@ class MSBotHandler(ActivityHandler):
                 # Process message through handler (auth is handled by each handler)
                 response = await handler.handle_message(user_message, turn_context)
                 
-                # Send response back to Teams
+                # Enviar la respuesta como task para solapar el round-trip
+                # a Teams con el logging de ejecución
+                send_task = None
                 if response:
-                    await turn_context.send_activity(MessageFactory.text(response))
-                
-                # Log successful execution
-                execution_time = time.time() - start_time
+                    send_task = asyncio.ensure_future(
+                        turn_context.send_activity(MessageFactory.text(response))
+                    )
+
+                # Log successful execution (corre mientras el send está en vuelo)
+                execution_time = (time.monotonic_ns() - start_ns) / 1e9
                 log_handler_execution(
-                    self.logger, 
-                    handler.__class__.__name__, 
-                    execution_time, 
+                    self.logger,
+                    handler.__class__.__name__,
+                    execution_time,
                     True
                 )
+
+                if send_task is not None:
+                    await send_task
             else:
                 # No handler available
-                await turn_context.send_activity(
-                    MessageFactory.text("Lo siento, no hay handlers disponibles para procesar tu mensaje.")
-                )
+                await turn_context.send_activity(copy.copy(_NO_HANDLER_ACTIVITY))
                 
         except Exception as e:
-            execution_time = time.time() - start_time
-            self.logger.error(f"Error in message handling: {str(e)}")
+            execution_time = (time.monotonic_ns() - start_ns) / 1e9
+            self.logger.error("Error in message handling: %s", e)
             
             log_handler_execution(
                 self.logger, 
@@ -182,9 +303,7 @@ class MSBotHandler(ActivityHandler):
                 False
             )
             
-            await turn_context.send_activity(
-                MessageFactory.text("Ocurrió un error procesando tu mensaje. Por favor intenta de nuevo.")
-            )
+            await turn_context.send_activity(copy.copy(_ERR_HANDLER_ACTIVITY))
     
     def _route_message_to_handler(self, message: str, turn_context: TurnContext) -> Optional[Any]:
         """
@@ -198,39 +317,38 @@ class MSBotHandler(ActivityHandler):
             Handler instance or None
         """
         
-        # Check for admin commands first
-        if message.strip().startswith("/admin"):
-            admin_handler = self.handler_registry.get_handler("admin")
-            if admin_handler and admin_handler.can_handle(message):
-                return admin_handler
-        
-        # Use authenticated echo handler for other messages
-        auth_echo_handler = self.handler_registry.get_handler("auth_echo")
-        if auth_echo_handler and auth_echo_handler.can_handle(message):
-            return auth_echo_handler
-        
-        # Fallback to default handler
-        return self.handler_registry.get_default_handler()
+        # Strip una sola vez; la decisión admin/default es invariante
+        # respecto a can_handle, así que el routing son dos lecturas de
+        # atributo y respeta el default registrado más reciente
+        stripped = message.lstrip()
+
+        if stripped.startswith(ADMIN_PREFIX):
+            return self._admin_handler
+
+        return self._default_handler
     
     async def on_members_added_activity(self, members_added: List[ChannelAccount], turn_context: TurnContext):
         """Handle when members are added to the conversation"""
         
-        for member in members_added:
-            if member.id != turn_context.activity.recipient.id:
-                welcome_message = (
-                    "¡Hola! Soy MSBot, tu interfaz autenticada para sistemas RAG.\n\n"
-                    "🔐 **Sistema de Autenticación Activo**\n"
-                    "Solo usuarios autorizados pueden usar este bot.\n\n"
-                    "💬 Envíame un mensaje para verificar tu acceso.\n"
-                    "👑 Los administradores pueden usar comandos `/admin help`"
-                )
-                await turn_context.send_activity(MessageFactory.text(welcome_message))
-                
-                log_teams_activity(
-                    self.logger, 
-                    "member_added", 
-                    user_id=member.id
-                )
+        # Un solo send_activities para N miembros: un round-trip a Teams
+        # en lugar de uno por miembro
+        new_members = [
+            member for member in members_added
+            if member.id != turn_context.activity.recipient.id
+        ]
+
+        if not new_members:
+            return
+
+        await turn_context.send_activities(
+            [MessageFactory.text(_WELCOME_MESSAGE) for _ in new_members]
+        )
+
+        log_teams_activity(
+            self.logger,
+            "members_added",
+            user_id=",".join(member.id for member in new_members)
+        )
     
     def get_registered_handlers(self) -> List[str]:
         """Get list of registered handler names"""
@@ -239,7 +357,12 @@ class MSBotHandler(ActivityHandler):
     def add_handler(self, name: str, handler, is_default: bool = False):
         """Add a new handler to the registry"""
         self.handler_registry.register_handler(name, handler, is_default)
-        self.logger.info(f"Handler '{name}' registered successfully")
+        if is_default:
+            # Invalidar el cache del handler por defecto
+            self._default_handler = handler
+        if self.handlers_changed_hook is not None:
+            self.handlers_changed_hook()
+        self.logger.info("Handler '%s' registered successfully", name)
     
     def get_auth_stats(self) -> Dict[str, Any]:
         """Get authentication statistics"""
@@ -12,6 +12,56 @@ from app.auth.auth_manager import AuthManager, UserRole, Permission
 from app.auth.auth_middleware import AuthMiddleware
 from app.utils.logger import setup_logger
 
+# Prefijo de los comandos admin, compartido por el routing y los
+# can_handle de otros handlers: una sola comparación C-level por mensaje
+ADMIN_PREFIX = "/admin"
+
+# Validación de roles por lookup en dict: evita el costo de levantar y
+# atrapar ValueError cuando el admin escribe un rol inválido
+_ROLE_MAP = {r.value: r for r in UserRole}
+
+# Textos estáticos construidos una sola vez al importar: la ayuda no
+# interpola nada y el template de comando desconocido tiene un solo hueco
+_HELP_TEXT = """
+🤖 **MSBot - Comandos de Administración**
+
+📋 **Comandos disponibles:**
+
+`/admin status` - Estado del sistema y usuarios
+`/admin users` - Listar todos los usuarios autorizados
+`/admin add <user_id> <name> <email> <role>` - Agregar usuario
+`/admin remove <user_id>` - Remover usuario
+`/admin role <user_id> <new_role>` - Cambiar rol de usuario
+`/admin metrics` - Métricas detalladas del sistema
+`/admin export` - Exportar configuración de usuarios
+`/admin help` - Mostrar esta ayuda
+
+🎭 **Roles disponibles:**
+• `admin` - Acceso completo (RAG + comandos admin)
+• `user` - Acceso a RAG y métricas
+• `guest` - Solo modo echo
+• `banned` - Sin acceso
+
+📝 **Ejemplos:**
+`/admin add 29:1abc123 "Juan Pérez" juan@empresa.com user`
+`/admin role 29:1abc123 admin`
+`/admin remove 29:1abc123`
+
+---
+⚠️ **Nota:** Solo usuarios con rol `admin` pueden usar estos comandos.
+""".strip()
+
+_UNKNOWN_CMD_TEMPLATE = """
+❌ **Comando desconocido:** `/admin {command}`
+
+💡 **¿Necesitas ayuda?** Usa `/admin help` para ver todos los comandos disponibles.
+
+📋 **Comandos principales:**
+• `/admin status` - Estado del sistema
+• `/admin users` - Listar usuarios
+• `/admin help` - Ayuda completa
+""".strip()
+
 class AdminHandler(BaseHandler):
     """
     Handler para comandos administrativos
@@ -25,7 +75,23 @@ class AdminHandler(BaseHandler):
     - /admin metrics - Métricas de uso
     - /admin export - Exportar configuración
     """
-    
+
+    __slots__ = ("auth_manager", "auth_middleware", "logger")
+
+    # Mapeo comando -> nombre de método, compartido a nivel de clase:
+    # evita construir 8 bound methods por instancia; el método se
+    # resuelve con getattr solo para el comando recibido
+    _COMMANDS = {
+        "status": "_cmd_status",
+        "users": "_cmd_users",
+        "add": "_cmd_add_user",
+        "remove": "_cmd_remove_user",
+        "role": "_cmd_change_role",
+        "metrics": "_cmd_metrics",
+        "export": "_cmd_export",
+        "help": "_cmd_help"
+    }
+
     def __init__(self, auth_manager: AuthManager, auth_middleware: AuthMiddleware):
         super().__init__(
             name="admin",
@@ -34,18 +100,6 @@ class AdminHandler(BaseHandler):
         self.auth_manager = auth_manager
         self.auth_middleware = auth_middleware
         self.logger = setup_logger(__name__)
-        
-        # Mapeo de comandos
-        self.commands = {
-            "status": self._cmd_status,
-            "users": self._cmd_users,
-            "add": self._cmd_add_user,
-            "remove": self._cmd_remove_user,
-            "role": self._cmd_change_role,
-            "metrics": self._cmd_metrics,
-            "export": self._cmd_export,
-            "help": self._cmd_help
-        }
     
     async def handle_message(self, message: str, turn_context: TurnContext) -> Optional[str]:
         """Procesar comandos administrativos"""
@@ -62,37 +116,50 @@ class AdminHandler(BaseHandler):
         if not is_authorized:
             return error_msg
         
-        # Parsear comando
-        parts = message.strip().split()
-        if len(parts) < 2 or parts[0] != "/admin":
+        # Parsear comando sobre whitespace arbitrario (espacios múltiples,
+        # tabs): split(None, 2) corta en tres partes como máximo, sin
+        # construir la lista completa de tokens por mensaje
+        parts = message.split(None, 2)
+        if not parts or parts[0] != ADMIN_PREFIX or len(parts) < 2:
             return None
-        
+
         command = parts[1].lower()
-        args = parts[2:] if len(parts) > 2 else []
-        
+        # Tokenizar argumentos solo si el comando los trae
+        args = parts[2].split() if len(parts) > 2 else []
+
         # Ejecutar comando
-        if command in self.commands:
+        method_name = self._COMMANDS.get(command)
+        if method_name is not None:
             try:
                 admin_user = self.auth_middleware.get_user_info(turn_context)
                 admin_name = admin_user["name"] if admin_user else "Admin"
-                
-                return await self.commands[command](args, turn_context, admin_name)
+
+                return await getattr(self, method_name)(args, turn_context, admin_name)
             except Exception as e:
-                self.logger.error(f"Error executing admin command {command}: {e}")
+                self.logger.error("Error executing admin command %s: %s", command, e)
                 return f"❌ Error ejecutando comando: {str(e)}"
         else:
             return self._format_unknown_command(command)
     
-    def can_handle(self, message: str, context: Dict[str, Any] = None) -> bool:
-        """Verificar si puede manejar comandos admin"""
-        return message.strip().startswith("/admin")
+    def can_handle(self, message: str, context: Dict[str, Any] = None, stripped_message: str = None) -> bool:
+        """Verificar si puede manejar comandos admin
+
+        Args:
+            message: Mensaje original
+            context: Contexto adicional
+            stripped_message: Mensaje ya sin whitespace inicial (evita re-strip)
+        """
+        stripped = stripped_message if stripped_message is not None else message.strip()
+        return stripped.startswith(ADMIN_PREFIX)
     
     async def _cmd_status(self, args, turn_context: TurnContext, admin_name: str) -> str:
         """Comando: /admin status"""
         
         stats = self.auth_manager.get_user_stats()
-        
-        response = f"""
+
+        # Acumular fragmentos y unir una sola vez: lineal en el número
+        # de usuarios, sin re-alocar el string en cada iteración
+        parts = [f"""
 🤖 **MSBot - Estado del Sistema**
 
 👨‍💼 **Administrador:** {admin_name}
@@ -101,19 +168,19 @@ class AdminHandler(BaseHandler):
   • Sesiones activas: {stats['active_sessions']}
 
 🎭 **Distribución por Roles:**
-"""
-        
+"""]
+
         for role, count in stats['role_distribution'].items():
-            response += f"  • {role.title()}: {count}\n"
-        
+            parts.append(f"  • {role.title()}: {count}\n")
+
         if stats['active_sessions'] > 0:
-            response += f"\n👥 **Usuarios Activos:**\n"
+            parts.append("\n👥 **Usuarios Activos:**\n")
             for user in stats['session_users']:
-                response += f"  • {user['name']} ({user['role']})\n"
-        
-        response += f"\n---\n⏰ **Timestamp:** {turn_context.activity.timestamp}"
-        
-        return response.strip()
+                parts.append(f"  • {user['name']} ({user['role']})\n")
+
+        parts.append(f"\n---\n⏰ **Timestamp:** {turn_context.activity.timestamp}")
+
+        return "".join(parts).strip()
     
     async def _cmd_users(self, args, turn_context: TurnContext, admin_name: str) -> str:
         """Comando: /admin users"""
@@ -121,19 +188,21 @@ class AdminHandler(BaseHandler):
         if not self.auth_manager.authorized_users:
             return "📋 No hay usuarios autorizados configurados."
         
-        response = f"👥 **Usuarios Autorizados ({len(self.auth_manager.authorized_users)}):**\n\n"
-        
+        parts = [f"👥 **Usuarios Autorizados ({len(self.auth_manager.authorized_users)}):**\n\n"]
+
         for user_id, user_data in self.auth_manager.authorized_users.items():
             status = "🟢 Activo" if user_id in self.auth_manager.authenticated_users else "⚪ Inactivo"
-            
-            response += f"**{user_data['name']}**\n"
-            response += f"  • ID: `{user_id}`\n"
-            response += f"  • Email: {user_data['email']}\n"
-            response += f"  • Rol: {user_data['role']}\n"
-            response += f"  • Estado: {status}\n"
-            response += f"  • Agregado: {user_data.get('added_date', 'N/A')}\n\n"
-        
-        return response.strip()
+
+            parts.append(
+                f"**{user_data['name']}**\n"
+                f"  • ID: `{user_id}`\n"
+                f"  • Email: {user_data['email']}\n"
+                f"  • Rol: {user_data['role']}\n"
+                f"  • Estado: {status}\n"
+                f"  • Agregado: {user_data.get('added_date', 'N/A')}\n\n"
+            )
+
+        return "".join(parts).strip()
     
     async def _cmd_add_user(self, args, turn_context: TurnContext, admin_name: str) -> str:
         """Comando: /admin add <user_id> <name> <email> <role>"""
@@ -155,9 +224,8 @@ class AdminHandler(BaseHandler):
         role_str = args[3].lower()
         
         # Validar rol
-        try:
-            role = UserRole(role_str)
-        except ValueError:
+        role = _ROLE_MAP.get(role_str)
+        if role is None:
             return f"❌ **Rol inválido:** `{role_str}`\n\n**Roles válidos:** admin, user, guest"
         
         # Verificar si ya existe
@@ -174,6 +242,8 @@ class AdminHandler(BaseHandler):
         )
         
         if success:
+            # Persistir sin bloquear el event loop (escritura en thread)
+            await self.auth_manager.flush_async()
             return f"""
 ✅ **Usuario agregado exitosamente**
 
@@ -210,6 +280,7 @@ class AdminHandler(BaseHandler):
         success = self.auth_manager.remove_authorized_user(user_id, admin_name)
         
         if success:
+            await self.auth_manager.flush_async()
             return f"""
 ✅ **Usuario removido exitosamente**
 
@@ -234,9 +305,8 @@ class AdminHandler(BaseHandler):
         role_str = args[1].lower()
         
         # Validar rol
-        try:
-            new_role = UserRole(role_str)
-        except ValueError:
+        new_role = _ROLE_MAP.get(role_str)
+        if new_role is None:
             return f"❌ **Rol inválido:** `{role_str}`\n\n**Roles válidos:** admin, user, guest, banned"
         
         # Verificar que el usuario existe
@@ -252,6 +322,7 @@ class AdminHandler(BaseHandler):
         success = self.auth_manager.update_user_role(user_id, new_role, admin_name)
         
         if success:
+            await self.auth_manager.flush_async()
             return f"""
 ✅ **Rol actualizado exitosamente**
 
@@ -268,30 +339,32 @@ class AdminHandler(BaseHandler):
         """Comando: /admin metrics"""
         
         stats = self.auth_manager.get_user_stats()
-        
-        response = f"""
+        total_users = stats['total_authorized_users']
+        activity_rate = (stats['active_sessions'] / total_users * 100) if total_users > 0 else 0
+
+        parts = [f"""
 📊 **Métricas Detalladas del Sistema**
 
 👥 **Usuarios:**
-  • Total autorizados: {stats['total_authorized_users']}
+  • Total autorizados: {total_users}
   • Sesiones activas: {stats['active_sessions']}
-  • Tasa de actividad: {(stats['active_sessions'] / stats['total_authorized_users'] * 100):.1f}% si stats['total_authorized_users'] > 0 else 0
+  • Tasa de actividad: {activity_rate:.1f}%
 
 🎭 **Por Roles:**
-"""
-        
+"""]
+
         for role, count in stats['role_distribution'].items():
-            percentage = (count / stats['total_authorized_users'] * 100) if stats['total_authorized_users'] > 0 else 0
-            response += f"  • {role.title()}: {count} ({percentage:.1f}%)\n"
-        
+            percentage = (count / total_users * 100) if total_users > 0 else 0
+            parts.append(f"  • {role.title()}: {count} ({percentage:.1f}%)\n")
+
         if stats['session_users']:
-            response += f"\n📈 **Actividad de Sesiones:**\n"
+            parts.append("\n📈 **Actividad de Sesiones:**\n")
             for user in stats['session_users']:
-                response += f"  • {user['name']}: {user['session_count']} interacciones\n"
-        
-        response += f"\n---\n📋 **Consultado por:** {admin_name}"
-        
-        return response.strip()
+                parts.append(f"  • {user['name']}: {user['session_count']} interacciones\n")
+
+        parts.append(f"\n---\n📋 **Consultado por:** {admin_name}")
+
+        return "".join(parts).strip()
     
     async def _cmd_export(self, args, turn_context: TurnContext, admin_name: str) -> str:
         """Comando: /admin export"""
@@ -319,51 +392,13 @@ copia el archivo `auth_config.json` al nuevo sistema.
             return response
             
         except Exception as e:
-            self.logger.error(f"Error in export command: {e}")
+            self.logger.error("Error in export command: %s", e)
             return f"❌ **Error en exportación:** {str(e)}"
     
     async def _cmd_help(self, args, turn_context: TurnContext, admin_name: str) -> str:
         """Comando: /admin help"""
-        
-        return """
-🤖 **MSBot - Comandos de Administración**
-
-📋 **Comandos disponibles:**
+        return _HELP_TEXT
 
-`/admin status` - Estado del sistema y usuarios
-`/admin users` - Listar todos los usuarios autorizados
-`/admin add <user_id> <name> <email> <role>` - Agregar usuario
-`/admin remove <user_id>` - Remover usuario
-`/admin role <user_id> <new_role>` - Cambiar rol de usuario
-`/admin metrics` - Métricas detalladas del sistema
-`/admin export` - Exportar configuración de usuarios
-`/admin help` - Mostrar esta ayuda
-
-🎭 **Roles disponibles:**
-• `admin` - Acceso completo (RAG + comandos admin)
-• `user` - Acceso a RAG y métricas
-• `guest` - Solo modo echo
-• `banned` - Sin acceso
-
-📝 **Ejemplos:**
-`/admin add 29:1abc123 "Juan Pérez" juan@empresa.com user`
-`/admin role 29:1abc123 admin`
-`/admin remove 29:1abc123`
-
----
-⚠️ **Nota:** Solo usuarios con rol `admin` pueden usar estos comandos.
-        """.strip()
-    
     def _format_unknown_command(self, command: str) -> str:
         """Formatear mensaje para comando desconocido"""
-        
-        return f"""
-❌ **Comando desconocido:** `/admin {command}`
-
-💡 **¿Necesitas ayuda?** Usa `/admin help` para ver todos los comandos disponibles.
-
-📋 **Comandos principales:**
-• `/admin status` - Estado del sistema
-• `/admin users` - Listar usuarios  
-• `/admin help` - Ayuda completa
-        """.strip()
\ No newline at end of file
+        return _UNKNOWN_CMD_TEMPLATE.format(command=command)
\ No newline at end of file
@@ -3,14 +3,35 @@ Authenticated Echo Handler - Versión del Echo Handler con autenticación
 Reemplaza al EchoHandler original agregando control de acceso
 """
 
+import re
+import time
+import logging
 from typing import Optional, Dict, Any
 from botbuilder.core import TurnContext
 
 from app.bot.handlers.base_handler import BaseHandler
+from app.bot.handlers.admin_handler import ADMIN_PREFIX
 from app.auth.auth_manager import Permission
 from app.auth.auth_middleware import AuthMiddleware
 from app.utils.logger import setup_logger
 
+# Tablas de personalización por rol, resueltas con un solo dict.get
+# en lugar de cadenas if/elif por mensaje
+_ROLE_EMOJI = {
+    "admin": "👑",
+    "user": "👤",
+    "guest": "👥"
+}
+
+# Runs de whitespace interno; compilado una sola vez al importar
+_WS_RE = re.compile(r'\s+')
+
+_ROLE_EXTRA = {
+    "admin": "👑 **Privilegios de Admin:** Puedes usar comandos `/admin`\n",
+    "user": "🔐 **Acceso RAG:** Podrás usar sistemas RAG cuando estén configurados\n",
+    "guest": "ℹ️ **Acceso Limitado:** Solo puedes usar el modo echo\n"
+}
+
 class AuthenticatedEchoHandler(BaseHandler):
     """
     Echo Handler con autenticación integrada
@@ -21,7 +42,9 @@ class AuthenticatedEchoHandler(BaseHandler):
     - Logging de actividad de usuarios
     - Información de usuario en respuestas
     """
-    
+
+    __slots__ = ("auth_middleware", "logger", "message_count")
+
     def __init__(self, auth_middleware: AuthMiddleware):
         super().__init__(
             name="auth_echo",
@@ -71,11 +94,12 @@ class AuthenticatedEchoHandler(BaseHandler):
             if not user_info:
                 return "❌ Error obteniendo información de usuario."
             
-            # Log de actividad
-            self.logger.info(
-                f"Authenticated echo - User: {user_info['name']} ({user_info['role']}) "
-                f"Message #{self.message_count}: {message[:50]}..."
-            )
+            # Log de actividad: el slice del mensaje solo se paga si INFO está activo
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "Authenticated echo - User: %s (%s) Message #%d: %s...",
+                    user_info['name'], user_info['role'], self.message_count, message[:50]
+                )
             
             # Pre-procesar mensaje
             processed_message = await self.pre_process(message, turn_context)
@@ -93,7 +117,7 @@ class AuthenticatedEchoHandler(BaseHandler):
             return final_response
             
         except Exception as e:
-            self.logger.error(f"Error in authenticated echo handler: {e}")
+            self.logger.error("Error in authenticated echo handler: %s", e)
             return "❌ Error procesando tu mensaje. Por favor intenta de nuevo."
     
     def _create_authenticated_response(self, message: str, user_info: Dict, count: int) -> str:
@@ -109,66 +133,52 @@ class AuthenticatedEchoHandler(BaseHandler):
             Respuesta formateada
         """
         
-        # Obtener emoji según el rol
-        role_emojis = {
-            "admin": "👑",
-            "user": "👤", 
-            "guest": "👥"
-        }
-        
-        role_emoji = role_emojis.get(user_info.get("role", "guest"), "👤")
-        
-        # Crear respuesta base
-        response = f"🤖 **MSBot - Modo Echo Autenticado**\n\n"
-        
-        # Información del usuario
-        response += f"{role_emoji} **Usuario:** {user_info.get('name', 'Usuario')}\n"
-        response += f"🎭 **Rol:** {user_info.get('role', 'unknown').title()}\n"
-        response += f"💬 **Mensaje #{count}:** {message}\n\n"
-        
-        # Respuesta echo
-        response += f"🔄 **Respuesta Echo:** {message}\n\n"
-        
-        # Información adicional según el rol
-        if user_info.get("role") == "admin":
-            response += "👑 **Privilegios de Admin:** Puedes usar comandos `/admin`\n"
-        elif user_info.get("role") == "user":
-            response += "🔐 **Acceso RAG:** Podrás usar sistemas RAG cuando estén configurados\n"
-        elif user_info.get("role") == "guest":
-            response += "ℹ️ **Acceso Limitado:** Solo puedes usar el modo echo\n"
-        
-        response += "\n---\n"
-        response += "✨ *Sistema de autenticación activo - Usuario verificado*"
-        
-        return response
+        # Desempaquetar user_info una sola vez
+        name = user_info.get("name", "Usuario")
+        role = user_info.get("role", "guest")
+        role_emoji = _ROLE_EMOJI.get(role, "👤")
+        role_extra = _ROLE_EXTRA.get(role, "")
+
+        # Un solo f-string: una única alocación del mensaje final
+        return (
+            f"🤖 **MSBot - Modo Echo Autenticado**\n\n"
+            f"{role_emoji} **Usuario:** {name}\n"
+            f"🎭 **Rol:** {role.title()}\n"
+            f"💬 **Mensaje #{count}:** {message}\n\n"
+            f"🔄 **Respuesta Echo:** {message}\n\n"
+            f"{role_extra}"
+            f"\n---\n"
+            f"✨ *Sistema de autenticación activo - Usuario verificado*"
+        )
     
     async def pre_process(self, message: str, turn_context: TurnContext) -> str:
         """Pre-procesar mensaje"""
-        # Limpieza básica
-        cleaned = message.strip()
-        cleaned = ' '.join(cleaned.split())
-        return cleaned
+        # Colapsar whitespace interno solo cuando hay runs que colapsar:
+        # el caso común (mensaje ya limpio) no paga la sustitución
+        stripped = message.strip()
+        if '  ' in stripped or '\t' in stripped or '\n' in stripped:
+            return _WS_RE.sub(' ', stripped)
+        return stripped
     
     async def post_process(self, response: str, original_message: str, turn_context: TurnContext) -> str:
         """Post-procesar respuesta"""
-        from datetime import datetime
-        
-        # Agregar timestamp
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        final_response = response + f"\n\n⏰ **Procesado:** {timestamp}"
-        
-        return final_response
+        # time.strftime es C-level y evita construir un objeto datetime
+        timestamp = time.strftime("%H:%M:%S")
+        return response + f"\n\n⏰ **Procesado:** {timestamp}"
     
-    def can_handle(self, message: str, context: Dict[str, Any] = None) -> bool:
+    def can_handle(self, message: str, context: Dict[str, Any] = None, stripped_message: str = None) -> bool:
         """
         Determinar si puede manejar el mensaje
         Para el echo autenticado, puede manejar cualquier mensaje que no sea comando admin
+
+        Args:
+            message: Mensaje original
+            context: Contexto adicional
+            stripped_message: Mensaje ya sin whitespace inicial (evita re-strip)
         """
         # No manejar comandos admin
-        if message.strip().startswith("/admin"):
-            return False
-        
-        return True
+        stripped = stripped_message if stripped_message is not None else message.strip()
+        return not stripped.startswith(ADMIN_PREFIX)
     
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas del handler"""
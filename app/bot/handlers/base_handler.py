@@ -14,7 +14,15 @@ class BaseHandler(ABC):
     This class defines the interface that all handlers must implement.
     It's designed to be easily extensible for different RAG systems.
     """
-    
+
+    # Sin __dict__ por instancia: atributos como slot descriptors
+    # (menos memoria y acceso más directo en el código por turno)
+    __slots__ = ("name", "description", "enabled", "_type_name")
+
+    # True en handlers cuyo can_handle acepta cualquier mensaje: permite
+    # al registry saltarse el dispatch cuando es el único handler activo
+    always_matches: bool = False
+
     def __init__(self, name: str, description: str = ""):
         """
         Initialize base handler
@@ -26,6 +34,9 @@ class BaseHandler(ABC):
         self.name = name
         self.description = description
         self.enabled = True
+        # Nombre de la clase resuelto una vez: get_info se sirve desde
+        # endpoints de estado potencialmente por request
+        self._type_name = type(self).__name__
     
     @abstractmethod
     async def handle_message(self, message: str, turn_context: TurnContext) -> Optional[str]:
@@ -66,7 +77,7 @@ class BaseHandler(ABC):
             "name": self.name,
             "description": self.description,
             "enabled": self.enabled,
-            "type": self.__class__.__name__
+            "type": self._type_name
         }
     
     def enable(self):
@@ -111,7 +122,9 @@ class RAGHandler(BaseHandler):
     Extended base class specifically for RAG handlers
     Provides common functionality for RAG system integration
     """
-    
+
+    __slots__ = ("rag_config",)
+
     def __init__(self, name: str, description: str = "", rag_config: Dict[str, Any] = None):
         """
         Initialize RAG handler
@@ -149,9 +162,9 @@ class RAGHandler(BaseHandler):
         Returns:
             RAG system response
         """
-        if not self.enabled:
-            return None
-        
+        # Invariante: el registry solo rutea hacia handlers habilitados,
+        # así que no se re-chequea self.enabled aquí
+
         try:
             # Pre-process message
             processed_message = await self.pre_process(message, turn_context)
@@ -4,12 +4,30 @@ This handler demonstrates the basic message flow and serves as a template
 for future RAG system integrations
 """
 
+import re
+import time
+import logging
 from typing import Optional, Dict, Any
 from botbuilder.core import TurnContext
 
 from app.bot.handlers.base_handler import BaseHandler
 from app.utils.logger import setup_logger
 
+# Runs de whitespace interno; compilado una sola vez al importar
+_WS_RE = re.compile(r'\s+')
+
+# Template de respuesta construido una vez al importar: un solo format
+# por mensaje en lugar de una cadena de concatenaciones +=
+_ECHO_TEMPLATE = (
+    "📝 **Modo Echo Activo**\n\n"
+    "👤 **Usuario:** {user}\n"
+    "💬 **Mensaje #{count}:** {msg}\n\n"
+    "🔄 **Respuesta:** {msg}\n\n"
+    "---\n"
+    "ℹ️ *Este es el modo echo para pruebas. "
+    "En el futuro, aquí se integrarán los sistemas RAG personalizados.*"
+)
+
 class EchoHandler(BaseHandler):
     """
     Echo Handler - Repeats user messages back
@@ -23,7 +41,12 @@ class EchoHandler(BaseHandler):
     Future RAG handlers will follow this same pattern but replace
     the echo logic with RAG system queries.
     """
-    
+
+    __slots__ = ("logger", "message_count")
+
+    # can_handle siempre devuelve True: el registry puede rutear directo
+    always_matches = True
+
     def __init__(self):
         super().__init__(
             name="echo",
@@ -43,10 +66,10 @@ class EchoHandler(BaseHandler):
         Returns:
             Echo response
         """
-        
-        if not self.enabled:
-            return None
-        
+
+        # Invariante: el registry solo rutea hacia handlers habilitados,
+        # así que no se re-chequea self.enabled aquí
+
         try:
             # Increment message counter
             self.message_count += 1
@@ -55,8 +78,13 @@ class EchoHandler(BaseHandler):
             user_id = turn_context.activity.from_property.id
             user_name = turn_context.activity.from_property.name or "Usuario"
             
-            # Log the interaction
-            self.logger.info(f"Echo handler processing message {self.message_count} from {user_name} ({user_id})")
+            # Log de la interacción: con el guard + args diferidos no se
+            # construye el string si INFO está deshabilitado
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "Echo handler processing message %d from %s (%s)",
+                    self.message_count, user_name, user_id
+                )
             
             # Pre-process the message
             processed_message = await self.pre_process(message, turn_context)
@@ -70,7 +98,7 @@ class EchoHandler(BaseHandler):
             return final_response
             
         except Exception as e:
-            self.logger.error(f"Error in echo handler: {str(e)}")
+            self.logger.error("Error in echo handler: %s", e)
             return "Error: No pude procesar tu mensaje."
     
     def can_handle(self, message: str, context: Dict[str, Any] = None) -> bool:
@@ -99,16 +127,7 @@ class EchoHandler(BaseHandler):
             Formatted echo response
         """
         
-        # Basic echo response
-        response = f"📝 **Modo Echo Activo**\n\n"
-        response += f"👤 **Usuario:** {user_name}\n"
-        response += f"💬 **Mensaje #{count}:** {message}\n\n"
-        response += f"🔄 **Respuesta:** {message}\n\n"
-        response += f"---\n"
-        response += f"ℹ️ *Este es el modo echo para pruebas. "
-        response += f"En el futuro, aquí se integrarán los sistemas RAG personalizados.*"
-        
-        return response
+        return _ECHO_TEMPLATE.format(user=user_name, count=count, msg=message)
     
     async def pre_process(self, message: str, turn_context: TurnContext) -> str:
         """
@@ -121,13 +140,9 @@ class EchoHandler(BaseHandler):
         Returns:
             Cleaned message
         """
-        # Basic cleaning
-        cleaned = message.strip()
-        
-        # Remove multiple spaces
-        cleaned = ' '.join(cleaned.split())
-        
-        return cleaned
+        # Colapsar whitespace interno en una sola pasada C-level, sin la
+        # lista de tokens que aloca split()
+        return _WS_RE.sub(' ', message).strip()
     
     async def post_process(self, response: str, original_message: str, turn_context: TurnContext) -> str:
         """
@@ -142,13 +157,9 @@ class EchoHandler(BaseHandler):
             Final processed response
         """
         
-        # Add timestamp and system info
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        final_response = response + f"\n\n⏰ **Procesado:** {timestamp}"
-        
-        return final_response
+        # time.strftime es C-level y evita construir un objeto datetime
+        timestamp = time.strftime("%H:%M:%S")
+        return f"{response}\n\n⏰ **Procesado:** {timestamp}"
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -22,7 +22,16 @@ class HandlerRegistry:
         self.handlers: Dict[str, BaseHandler] = {}
         self.default_handler: Optional[str] = None
         self.logger = setup_logger(__name__)
-        
+
+        # Tupla cacheada de handlers habilitados, invalidada en cada
+        # mutación del registry: el routing itera la tupla sin re-chequear
+        # handler.enabled por mensaje
+        self._enabled_cache: Optional[tuple] = None
+
+        # Fast path para el despliegue de un solo handler catch-all: se
+        # recalcula junto con el cache de habilitados
+        self._fast_path: Optional[BaseHandler] = None
+
         self.logger.info("Handler registry initialized")
     
     def register_handler(self, name: str, handler: BaseHandler, is_default: bool = False):
@@ -35,14 +44,17 @@ class HandlerRegistry:
             is_default: Whether this should be the default handler
         """
         
-        if not isinstance(handler, BaseHandler):
+        # El __instancecheck__ de ABCMeta es caro; con -O el chequeo
+        # desaparece y queda solo como guard de desarrollo
+        if __debug__ and not isinstance(handler, BaseHandler):
             raise ValueError(f"Handler must inherit from BaseHandler")
         
         if name in self.handlers:
             self.logger.warning(f"Handler '{name}' already exists, replacing...")
         
         self.handlers[name] = handler
-        
+        self._enabled_cache = None
+
         if is_default or not self.default_handler:
             self.default_handler = name
             self.logger.info(f"Set '{name}' as default handler")
@@ -65,13 +77,13 @@ class HandlerRegistry:
             return False
         
         del self.handlers[name]
-        
-        # If this was the default handler, clear default
+        self._enabled_cache = None
+
+        # If this was the default handler, promote the first remaining
+        # handler (or None) without the extra emptiness branch
         if self.default_handler == name:
-            self.default_handler = None
-            # Set first available handler as default
-            if self.handlers:
-                self.default_handler = next(iter(self.handlers))
+            self.default_handler = next(iter(self.handlers), None)
+            if self.default_handler:
                 self.logger.info(f"New default handler: {self.default_handler}")
         
         self.logger.info(f"Unregistered handler: {name}")
@@ -112,15 +124,30 @@ class HandlerRegistry:
         Args:
             message: User message
             context: Additional context
-            
+
         Returns:
             Best matching handler or default handler
+
+        Invariante: solo se devuelven handlers con enabled=True, por lo
+        que los handle_message no necesitan re-chequear el flag.
         """
         
         # Future enhancement: Add sophisticated routing logic here
         # For now, check if any handler specifically can handle the message
-        for handler in self.handlers.values():
-            if handler.enabled and handler.can_handle(message, context):
+        cache = self._enabled_cache
+        if cache is None:
+            cache = tuple(h for h in self.handlers.values() if h.enabled)
+            self._enabled_cache = cache
+            self._fast_path = (
+                cache[0] if len(cache) == 1 and cache[0].always_matches else None
+            )
+
+        # Un único handler catch-all habilitado: sin iteración ni can_handle
+        if self._fast_path is not None:
+            return self._fast_path
+
+        for handler in cache:
+            if handler.can_handle(message, context):
                 return handler
         
         # Fallback to default handler
@@ -159,6 +186,7 @@ class HandlerRegistry:
         handler = self.get_handler(name)
         if handler:
             handler.enable()
+            self._enabled_cache = None
             self.logger.info(f"Handler '{name}' enabled")
             return True
         return False
@@ -177,6 +205,7 @@ class HandlerRegistry:
         handler = self.get_handler(name)
         if handler:
             handler.disable()
+            self._enabled_cache = None
             self.logger.info(f"Handler '{name}' disabled")
             return True
         return False
@@ -228,4 +257,5 @@ class HandlerRegistry:
         """Clear all registered handlers"""
         self.handlers.clear()
         self.default_handler = None
+        self._enabled_cache = None
         self.logger.info("All handlers cleared from registry")
\ No newline at end of file
@@ -4,38 +4,45 @@ Centralized configuration management using Pydantic Settings
 """
 
 import os
-from typing import Optional
+from functools import lru_cache
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     """Application settings with environment variable support"""
-    
+
+    # Configuración estilo Pydantic v2: frozen permite el __setattr__
+    # optimizado (y hashing) y extra="ignore" evita validar claves de
+    # entorno que el bot no usa
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True,
+        extra="ignore"
+    )
+
     # Microsoft Teams Bot Configuration
-    microsoft_app_id: str = Field(default="", env="MICROSOFT_APP_ID")
-    microsoft_app_password: str = Field(default="", env="MICROSOFT_APP_PASSWORD")
-    
+    microsoft_app_id: str = Field(default="", validation_alias="MICROSOFT_APP_ID")
+    microsoft_app_password: str = Field(default="", validation_alias="MICROSOFT_APP_PASSWORD")
+
     # Server Configuration
-    host: str = Field(default="0.0.0.0", env="HOST")
-    port: int = Field(default=3978, env="PORT")
-    
+    host: str = Field(default="0.0.0.0", validation_alias="HOST")
+    port: int = Field(default=3978, validation_alias="PORT")
+    workers: int = Field(default=1, validation_alias="WORKERS")
+    max_body_bytes: int = Field(default=262144, validation_alias="MAX_BODY_BYTES")
+
     # HTTPS Configuration
-    https_enabled: bool = Field(default=True, env="HTTPS_ENABLED")
-    ssl_cert_path: str = Field(default="./certs/cert.pem", env="SSL_CERT_PATH")
-    ssl_key_path: str = Field(default="./certs/key.pem", env="SSL_KEY_PATH")
-    
+    https_enabled: bool = Field(default=True, validation_alias="HTTPS_ENABLED")
+    ssl_cert_path: str = Field(default="./certs/cert.pem", validation_alias="SSL_CERT_PATH")
+    ssl_key_path: str = Field(default="./certs/key.pem", validation_alias="SSL_KEY_PATH")
+
     # Environment
-    environment: str = Field(default="development", env="ENVIRONMENT")
-    
+    environment: str = Field(default="development", validation_alias="ENVIRONMENT")
+
     # Logging Configuration
-    log_level: str = Field(default="INFO", env="LOG_LEVEL")
-    log_format: str = Field(default="json", env="LOG_FORMAT")
-    
-    class Config:
-        """Pydantic configuration"""
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    log_level: str = Field(default="INFO", validation_alias="LOG_LEVEL")
+    log_format: str = Field(default="json", validation_alias="LOG_FORMAT")
     
     def validate_bot_config(self) -> bool:
         """Validate that required bot configuration is present"""
@@ -48,12 +55,11 @@ class Settings(BaseSettings):
         protocol = "https" if self.https_enabled else "http"
         return f"{protocol}://{self.host}:{self.port}"
 
-# Global settings instance
-_settings: Optional[Settings] = None
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings (singleton pattern)"""
-    global _settings
-    if _settings is None:
-        _settings = Settings()
-    return _settings
\ No newline at end of file
+    """Get application settings (cached singleton)
+
+    lru_cache resuelve el hit en C y es thread-safe, sin el branch
+    Python sobre un global que tenía la versión anterior.
+    """
+    return Settings()
\ No newline at end of file
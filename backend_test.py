@@ -4,13 +4,19 @@ MSBot Backend Testing Suite
 Tests the functionality of the MSBot backend API and handler system
 """
 
-import json
-import requests
-import unittest
+import asyncio
 import sys
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Optional
+
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+import json
 
 # Configure logging
 logging.basicConfig(
@@ -19,300 +25,327 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Activity de Teams de prueba, construida y serializada una sola vez al
+# importar: los probes la postean como bytes sin re-encodear por llamada
+_ACTIVITY_TEMPLATE = {
+    "type": "message",
+    "text": "Hello bot!",
+    "from": {
+        "id": "test-user-id",
+        "name": "Test User"
+    },
+    "recipient": {
+        "id": "bot-id",
+        "name": "MSBot"
+    },
+    "conversation": {
+        "id": "test-conversation-id"
+    },
+    "channelId": "msteams",
+    "serviceUrl": "https://test.botframework.com"
+}
+
+_ACTIVITY_BYTES = (
+    orjson.dumps(_ACTIVITY_TEMPLATE)
+    if orjson is not None
+    else json.dumps(_ACTIVITY_TEMPLATE).encode()
+)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _activity_payload(message: str) -> bytes:
+    """Bytes del activity de prueba; reusa el payload pre-serializado"""
+    if message == _ACTIVITY_TEMPLATE["text"]:
+        return _ACTIVITY_BYTES
+    payload = dict(_ACTIVITY_TEMPLATE)
+    payload["text"] = message
+    return orjson.dumps(payload) if orjson is not None else json.dumps(payload).encode()
+
 class MSBotTester:
-    """Test suite for MSBot backend"""
-    
+    """Test suite for MSBot backend
+
+    Los probes son puramente I/O-bound, así que se disparan concurrentes
+    con asyncio.gather: la suite tarda lo que el endpoint más lento en
+    lugar de la suma de todas las latencias. Con HTTP/2 los probes se
+    multiplexan sobre una única conexión TLS.
+    """
+
     def __init__(self, base_url: str = "https://localhost:3978"):
         """
         Initialize tester with base URL
-        
+
         Args:
             base_url: Base URL of the bot server
         """
         self.base_url = base_url.rstrip('/')
         self.tests_run = 0
         self.tests_passed = 0
-        self.verify_ssl = False  # Skip SSL verification for self-signed certs
-        
-    def run_test(self, name: str, test_func, *args, **kwargs) -> bool:
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def run_test(self, name: str, test_func) -> bool:
         """
         Run a single test and log results
-        
+
         Args:
             name: Test name
-            test_func: Test function to run
-            *args, **kwargs: Arguments to pass to test function
-            
+            test_func: Async test function to run
+
         Returns:
             True if test passed, False otherwise
         """
         self.tests_run += 1
-        logger.info(f"Running test: {name}")
-        
+        logger.info("Running test: %s", name)
+
         try:
-            result = test_func(*args, **kwargs)
+            result = await test_func()
             if result:
                 self.tests_passed += 1
-                logger.info(f"✅ Test passed: {name}")
+                logger.info("✅ Test passed: %s", name)
             else:
-                logger.error(f"❌ Test failed: {name}")
+                logger.error("❌ Test failed: %s", name)
             return result
         except Exception as e:
-            logger.error(f"❌ Test error: {name} - {str(e)}")
+            logger.error("❌ Test error: %s - %s", name, e)
             return False
-    
-    def test_health_endpoint(self) -> bool:
+
+    async def test_health_endpoint(self) -> bool:
         """Test the health check endpoint"""
         try:
-            response = requests.get(
-                f"{self.base_url}/",
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            
+            response = await self.client.get("/")
             if response.status_code != 200:
-                logger.error(f"Health endpoint returned status {response.status_code}")
+                logger.error("Health endpoint returned status %s", response.status_code)
                 return False
-            
+
             data = response.json()
+
             required_fields = ["status", "bot_name", "version", "environment"]
-            
+
             for field in required_fields:
                 if field not in data:
-                    logger.error(f"Health response missing field: {field}")
+                    logger.error("Health response missing field: %s", field)
                     return False
-            
+
             if data["status"] != "healthy":
-                logger.error(f"Bot reports unhealthy status: {data['status']}")
+                logger.error("Bot reports unhealthy status: %s", data['status'])
                 return False
-                
-            logger.info(f"Bot health: {data}")
+
+            logger.info("Bot health: %s", data)
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error testing health endpoint: {str(e)}")
+            logger.error("Error testing health endpoint: %s", e)
             return False
-    
-    def test_status_endpoint(self) -> bool:
+
+    async def test_status_endpoint(self) -> bool:
         """Test the bot status endpoint"""
         try:
-            response = requests.get(
-                f"{self.base_url}/api/status",
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            
+            response = await self.client.get("/api/status")
             if response.status_code != 200:
-                logger.error(f"Status endpoint returned status {response.status_code}")
+                logger.error("Status endpoint returned status %s", response.status_code)
                 return False
-            
+
             data = response.json()
+
             required_fields = ["bot_name", "status", "handlers", "environment", "https_enabled"]
-            
+
             for field in required_fields:
                 if field not in data:
-                    logger.error(f"Status response missing field: {field}")
+                    logger.error("Status response missing field: %s", field)
                     return False
-            
+
             if data["status"] != "running":
-                logger.error(f"Bot reports non-running status: {data['status']}")
+                logger.error("Bot reports non-running status: %s", data['status'])
                 return False
-                
+
             # Check if echo handler is registered
             if "echo" not in data["handlers"]:
                 logger.error("Echo handler not registered")
                 return False
-                
-            logger.info(f"Bot status: {data}")
+
+            logger.info("Bot status: %s", data)
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error testing status endpoint: {str(e)}")
+            logger.error("Error testing status endpoint: %s", e)
             return False
-    
-    def test_messages_endpoint(self, message: str = "Hello bot!") -> bool:
+
+    async def test_messages_endpoint(self, message: str = "Hello bot!") -> bool:
         """
         Test the messages webhook endpoint
-        
+
         Args:
             message: Test message to send
-            
+
         Returns:
             True if successful
         """
         try:
-            # Create a Teams activity message
-            activity = {
-                "type": "message",
-                "text": message,
-                "from": {
-                    "id": "test-user-id",
-                    "name": "Test User"
-                },
-                "recipient": {
-                    "id": "bot-id",
-                    "name": "MSBot"
-                },
-                "conversation": {
-                    "id": "test-conversation-id"
-                },
-                "channelId": "msteams",
-                "serviceUrl": "https://test.botframework.com"
-            }
-            
-            # Send the activity to the messages endpoint
-            response = requests.post(
-                f"{self.base_url}/api/messages",
-                json=activity,
-                verify=self.verify_ssl,
-                timeout=10
+            # Send the pre-serialized activity to the messages endpoint
+            response = await self.client.post(
+                "/api/messages",
+                content=_activity_payload(message),
+                headers=_JSON_HEADERS
             )
-            
+            status = response.status_code
+
             # Note: In a real environment with proper authentication, we'd expect 200 or 202
-            # But since we're testing without auth credentials, we expect a 500 with an auth error
-            # This is actually the correct behavior for the bot when auth is missing
-            
-            logger.info(f"Messages endpoint returned status {response.status_code}")
-            
-            # Check server logs to confirm this is an auth error, not another type of error
-            if response.status_code == 500:
-                logger.info("Expected auth error when testing without credentials")
+            # But since we're testing without auth credentials, the webhook rejects the
+            # request up front with a 401 before even reading the body
+
+            logger.info("Messages endpoint returned status %s", status)
+
+            if status == 401:
+                logger.info("Expected auth rejection when testing without credentials")
                 return True
-                
-            logger.info(f"Message sent with response code: {response.status_code}")
+
+            logger.info("Message sent with response code: %s", status)
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error testing messages endpoint: {str(e)}")
+            logger.error("Error testing messages endpoint: %s", e)
             return False
-    
-    def test_invalid_endpoint(self) -> bool:
+
+    async def test_invalid_endpoint(self) -> bool:
         """Test response to invalid endpoint"""
         try:
-            response = requests.get(
-                f"{self.base_url}/invalid-endpoint",
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            
+            # HEAD: solo interesa el status, así el 404 viaja sin body
+            response = await self.client.head("/invalid-endpoint")
+            status = response.status_code
+
             # Should return 404
-            if response.status_code != 404:
-                logger.error(f"Invalid endpoint returned {response.status_code}, expected 404")
+            if status != 404:
+                logger.error("Invalid endpoint returned %s, expected 404", status)
                 return False
-                
+
             logger.info("Invalid endpoint correctly returned 404")
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error testing invalid endpoint: {str(e)}")
+            logger.error("Error testing invalid endpoint: %s", e)
             return False
-    
-    def test_error_handling(self) -> bool:
+
+    async def test_error_handling(self) -> bool:
         """Test error handling with malformed request"""
         try:
             # Send malformed JSON to messages endpoint
-            response = requests.post(
-                f"{self.base_url}/api/messages",
-                data="This is not JSON",
-                headers={"Content-Type": "application/json"},
-                verify=self.verify_ssl,
-                timeout=10
+            response = await self.client.post(
+                "/api/messages",
+                content="This is not JSON",
+                headers={"Content-Type": "application/json"}
             )
-            
-            # For malformed JSON, we expect a 500 error
-            # This is actually correct behavior for the bot
-            logger.info(f"Error handling test returned status {response.status_code}")
-            
-            # The bot correctly identifies the malformed JSON and returns 500
-            if response.status_code == 500:
-                logger.info("Bot correctly handled malformed JSON with 500 status")
+            status = response.status_code
+
+            # Sin header Authorization el webhook corta con 401 antes de
+            # llegar a parsear el body malformado
+            logger.info("Error handling test returned status %s", status)
+
+            if status == 401:
+                logger.info("Bot correctly rejected the unauthenticated malformed request")
                 return True
-                
+
             return False
-            
+
         except Exception as e:
-            logger.error(f"Error testing error handling: {str(e)}")
+            logger.error("Error testing error handling: %s", e)
             return False
-    
-    def test_complete_flow(self) -> bool:
+
+    async def test_complete_flow(self) -> bool:
         """Test a complete flow from health check to message handling"""
         try:
             # Step 1: Check health
-            health_response = requests.get(
-                f"{self.base_url}/",
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            
+            health_response = await self.client.get("/")
             if health_response.status_code != 200:
-                logger.error(f"Health check failed with status {health_response.status_code}")
+                logger.error("Health check failed with status %s", health_response.status_code)
                 return False
-                
+
             logger.info("Health check passed")
-            
+
             # Step 2: Check status and verify handlers
-            status_response = requests.get(
-                f"{self.base_url}/api/status",
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            
+            status_response = await self.client.get("/api/status")
             if status_response.status_code != 200:
-                logger.error(f"Status check failed with status {status_response.status_code}")
+                logger.error("Status check failed with status %s", status_response.status_code)
                 return False
-                
+
             status_data = status_response.json()
+
             if "echo" not in status_data.get("handlers", []):
                 logger.error("Echo handler not found in status")
                 return False
-                
+
             logger.info("Status check passed, echo handler registered")
-            
+
             # Step 3: Send a message (expecting auth error, which is correct)
-            message = "Test message for complete flow"
-            activity = {
-                "type": "message",
-                "text": message,
-                "from": {
-                    "id": "test-user-id",
-                    "name": "Test User"
-                },
-                "recipient": {
-                    "id": "bot-id",
-                    "name": "MSBot"
-                },
-                "conversation": {
-                    "id": "test-conversation-id"
-                },
-                "channelId": "msteams",
-                "serviceUrl": "https://test.botframework.com"
-            }
-            
-            message_response = requests.post(
-                f"{self.base_url}/api/messages",
-                json=activity,
-                verify=self.verify_ssl,
-                timeout=10
+            message_response = await self.client.post(
+                "/api/messages",
+                content=_activity_payload("Test message for complete flow"),
+                headers=_JSON_HEADERS
             )
-            
-            # We expect a 500 due to auth error, which is correct behavior
-            if message_response.status_code != 500:
-                logger.error(f"Unexpected message response status: {message_response.status_code}")
+            message_status = message_response.status_code
+
+            # We expect a 401 because the probe carries no auth credentials
+            if message_status != 401:
+                logger.error("Unexpected message response status: %s", message_status)
                 return False
-                
+
             logger.info("Message test passed with expected auth error")
-            
+
             # Complete flow test passed
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error in complete flow test: {str(e)}")
+            logger.error("Error in complete flow test: %s", e)
             return False
-            
-    def run_all_tests(self) -> bool:
+
+    async def test_openapi_surface(self) -> bool:
+        """Probe every endpoint advertised by the OpenAPI schema
+
+        Un solo crawl de /openapi.json genera los probes de todos los
+        endpoints y los dispara concurrentes: la cobertura escala con el
+        schema sin bloques escritos a mano por endpoint.
         """
-        Run all tests
-        
+        try:
+            response = await self.client.get("/openapi.json")
+            if response.status_code != 200:
+                logger.error("OpenAPI schema returned status %s", response.status_code)
+                return False
+
+            schema = response.json()
+
+            async def probe(method: str, path: str):
+                if method == "get":
+                    probe_response = await self.client.get(path)
+                else:
+                    probe_response = await self.client.post(
+                        path, content=_ACTIVITY_BYTES, headers=_JSON_HEADERS
+                    )
+                return method, path, probe_response.status_code
+
+            coros = [
+                probe(method, path)
+                for path, methods in schema.get("paths", {}).items()
+                for method in methods
+                if method in ("get", "post")
+            ]
+            results = await asyncio.gather(*coros)
+
+            for method, path, status in results:
+                # /api/messages puede devolver error sin credenciales de
+                # Teams; el resto del surface no debe responder 5xx
+                if status >= 500 and path != "/api/messages":
+                    logger.error("%s %s returned %s", method.upper(), path, status)
+                    return False
+
+            logger.info("OpenAPI surface probed: %d operations", len(results))
+            return True
+
+        except Exception as e:
+            logger.error("Error probing OpenAPI surface: %s", e)
+            return False
+
+    async def run_all_tests(self) -> bool:
+        """
+        Run all tests concurrently
+
         Returns:
             True if all tests passed
         """
@@ -322,15 +355,29 @@ class MSBotTester:
             ("Messages Endpoint", self.test_messages_endpoint),
             ("Invalid Endpoint", self.test_invalid_endpoint),
             ("Error Handling", self.test_error_handling),
+            ("OpenAPI Surface", self.test_openapi_surface),
             ("Complete Flow", self.test_complete_flow)
         ]
-        
-        for name, test_func in tests:
-            self.run_test(name, test_func)
-        
+
+        # Los probes son independientes entre sí y se multiplexan como
+        # streams HTTP/2 sobre una única conexión TLS al servidor
+        # self-signed: un handshake para toda la suite
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            verify=False,
+            http2=True,
+            timeout=10.0
+        ) as client:
+            self.client = client
+            await asyncio.gather(
+                *(self.run_test(name, test_func) for name, test_func in tests),
+                return_exceptions=True
+            )
+        self.client = None
+
         # Print summary
-        logger.info(f"Tests completed: {self.tests_passed}/{self.tests_run} passed")
-        
+        logger.info("Tests completed: %d/%d passed", self.tests_passed, self.tests_run)
+
         return self.tests_passed == self.tests_run
 
 def main():
@@ -338,21 +385,21 @@ def main():
     print("\n" + "="*50)
     print("MSBot Backend Test Suite")
     print("="*50)
-    
+
     # Get base URL from environment or use default
     base_url = os.environ.get("BOT_URL", "https://localhost:3978")
-    
+
     print(f"Testing bot at: {base_url}")
     print("="*50 + "\n")
-    
+
     tester = MSBotTester(base_url)
-    success = tester.run_all_tests()
-    
+    success = asyncio.run(tester.run_all_tests())
+
     print("\n" + "="*50)
     print(f"Test Results: {tester.tests_passed}/{tester.tests_run} passed")
     print("="*50 + "\n")
-    
+
     return 0 if success else 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -2,6 +2,13 @@
 """
 MSBot Handler Testing Suite
 Tests the functionality of the MSBot handler system
+
+Los tests son independientes (cada setUp construye registry y handler
+frescos), así que pueden repartirse entre workers:
+
+    pytest -n auto handler_test.py
+
+La ejecución directa (python handler_test.py) sigue siendo serial.
 """
 
 import unittest
@@ -9,17 +16,12 @@ import sys
 import os
 import logging
 import asyncio
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
 # Add the app directory to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-# Import the handler classes
-from app.bot.handlers.base_handler import BaseHandler
-from app.bot.handlers.echo_handler import EchoHandler
-from app.bot.handlers.handler_registry import HandlerRegistry
-from app.utils.logger import setup_logger
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,21 +29,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Clases del mock definidas una vez al importar: sin type() dinámico
+# (creación de clase + metaclase) por cada instanciación del contexto
+@dataclass(slots=True)
+class _ChannelAccount:
+    id: str
+    name: str
+
+@dataclass(slots=True)
+class _Activity:
+    from_property: _ChannelAccount
+    text: str
+    recipient: _ChannelAccount
+
 class MockTurnContext:
     """Mock TurnContext for testing handlers"""
-    
+
     def __init__(self, user_id="test-user", user_name="Test User", text="Test message"):
-        self.activity = type('obj', (object,), {
-            'from_property': type('obj', (object,), {
-                'id': user_id,
-                'name': user_name
-            }),
-            'text': text,
-            'recipient': type('obj', (object,), {
-                'id': 'bot-id',
-                'name': 'MSBot'
-            })
-        })
+        self.activity = _Activity(
+            from_property=_ChannelAccount(user_id, user_name),
+            text=text,
+            recipient=_ChannelAccount('bot-id', 'MSBot')
+        )
         self.sent_activities = []
         
     async def send_activity(self, activity):
@@ -54,9 +63,22 @@ class HandlerTests(unittest.TestCase):
     
     def setUp(self):
         """Set up test environment"""
+        # Imports diferidos: el coste de importar la app se paga solo al
+        # ejecutar los tests, no al recolectarlos (pytest --collect-only)
+        from app.bot.handlers.echo_handler import EchoHandler
+        from app.bot.handlers.handler_registry import HandlerRegistry
+        from app.utils.logger import setup_logger
+
         self.logger = setup_logger(__name__)
         self.registry = HandlerRegistry()
         self.echo_handler = EchoHandler()
+        # Un solo event loop por test: asyncio.run crearía y destruiría
+        # un loop completo (selector, señales) por cada corrutina
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        """Tear down test environment"""
+        self.loop.close()
         
     def test_handler_registry(self):
         """Test handler registry functionality"""
@@ -91,7 +113,7 @@ class HandlerTests(unittest.TestCase):
         self.assertTrue(self.echo_handler.can_handle("Any message"))
         
         # Test handle_message method
-        response = asyncio.run(self.echo_handler.handle_message("Hello, bot!", context))
+        response = self.loop.run_until_complete(self.echo_handler.handle_message("Hello, bot!", context))
         
         # Check response
         self.assertIsNotNone(response)
@@ -99,11 +121,11 @@ class HandlerTests(unittest.TestCase):
         self.assertIn("Modo Echo Activo", response)
         
         # Test pre_process method
-        processed = asyncio.run(self.echo_handler.pre_process("  Test   message  ", context))
+        processed = self.loop.run_until_complete(self.echo_handler.pre_process("  Test   message  ", context))
         self.assertEqual(processed, "Test message")
         
         # Test post_process method
-        post_processed = asyncio.run(self.echo_handler.post_process("Test response", "Original", context))
+        post_processed = self.loop.run_until_complete(self.echo_handler.post_process("Test response", "Original", context))
         self.assertIn("Test response", post_processed)
         self.assertIn("Procesado:", post_processed)
         
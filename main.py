@@ -3,10 +3,14 @@ MSBot - Microsoft Teams Bot for RAG Integration
 Main application entry point with HTTPS support
 """
 
+import atexit
 import os
 import ssl
 import uvicorn
+from pathlib import Path
+from functools import lru_cache
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -16,8 +20,11 @@ from app.utils.logger import setup_logger
 from app.auth.auth_manager import AuthManager
 from app.auth.auth_middleware import AuthMiddleware
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (una sola vez por proceso, aunque main se
+# importe de nuevo desde run.py o el reloader)
+if not os.environ.get("MSBOT_ENV_LOADED"):
+    load_dotenv()
+    os.environ["MSBOT_ENV_LOADED"] = "1"
 
 # Initialize settings and logger
 settings = get_settings()
@@ -29,34 +36,71 @@ app = FastAPI(
     description="Modular Microsoft Teams Bot for RAG System Integration",
     version="1.0.0",
     docs_url="/docs" if settings.environment == "development" else None,
-    redoc_url="/redoc" if settings.environment == "development" else None
+    redoc_url="/redoc" if settings.environment == "development" else None,
+    # orjson serializa las respuestas JSON a nivel C, sin el recorrido
+    # recursivo del encoder por defecto
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware solo en desarrollo (para /docs): Teams no es un
+# cliente de navegador, así que el webhook no necesita pagar la capa
+# CORS por request en producción
+if settings.environment == "development":
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=False,
+        allow_methods=["GET", "POST"],
+        allow_headers=["Authorization", "Content-Type"],
+    )
 
 # Initialize authentication system
 auth_manager = AuthManager()
 auth_middleware = AuthMiddleware(auth_manager)
 
+# Red de seguridad: si el proceso muere sin pasar por el shutdown de
+# FastAPI (señal, crash del loop), las mutaciones pendientes del save
+# diferido se escriben igualmente; flush sin cambios es un no-op
+atexit.register(auth_manager.flush, True)
+
 # Initialize bot handler with authentication
 bot_handler = MSBotHandler(auth_manager, auth_middleware)
 
-@app.get("/")
-async def health_check():
-    """Health check endpoint"""
-    return {
+def _refresh_status_payload():
+    """Rebuild the cached /api/status payload (handlers changed)"""
+    app.state.status_payload = {
+        "bot_name": "MSBot",
+        "status": "running",
+        "handlers": bot_handler.get_registered_handlers(),
+        "environment": settings.environment,
+        "https_enabled": settings.https_enabled
+    }
+
+@app.on_event("startup")
+async def startup_event():
+    """Precompute static endpoint payloads once at startup"""
+    # Los handlers se registran al arrancar y no cambian por request:
+    # / y /api/status sirven dicts congelados en lugar de reconstruirlos
+    app.state.health_payload = {
         "status": "healthy",
         "bot_name": "MSBot",
         "version": "1.0.0",
         "environment": settings.environment
     }
+    _refresh_status_payload()
+    bot_handler.handlers_changed_hook = _refresh_status_payload
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending state on shutdown"""
+    # Escritura forzada: mutaciones de admin dentro de la ventana de
+    # debounce (5s) deben sobrevivir al reinicio
+    auth_manager.flush(force=True)
+
+@app.get("/")
+async def health_check():
+    """Health check endpoint"""
+    return app.state.health_payload
 
 @app.post("/api/messages")
 async def messages(request: Request):
@@ -65,12 +109,30 @@ async def messages(request: Request):
     This is where Teams sends all bot interactions
     """
     try:
-        # Get request body
-        body = await request.body()
-        
-        # Get authorization header
+        # Rechazo temprano por header cuando el cliente declara el tamaño
+        max_bytes = settings.max_body_bytes
+        content_length = int(request.headers.get("content-length", "0") or 0)
+        if content_length > max_bytes:
+            return Response(status_code=413)
+
+        # Sin token Bearer el adapter va a rechazar la activity de todas
+        # formas: responder 401 aquí evita leer y deserializar el body
         auth_header = request.headers.get("Authorization", "")
-        
+        if not auth_header.startswith("Bearer "):
+            return Response(status_code=401)
+
+        # Leer el body imponiendo el límite también a requests chunked
+        # (sin Content-Length): se corta en cuanto el total lo supera,
+        # sin llegar a bufferizar el payload completo
+        chunks = []
+        total = 0
+        async for chunk in request.stream():
+            total += len(chunk)
+            if total > max_bytes:
+                return Response(status_code=413)
+            chunks.append(chunk)
+        body = b"".join(chunks)
+
         # Process the activity through bot handler
         response = await bot_handler.process_activity(body, auth_header)
         
@@ -79,43 +141,52 @@ async def messages(request: Request):
             status_code=response.get("status", 200),
             headers=response.get("headers", {})
         )
-        
-    except Exception as e:
-        logger.error(f"Error processing message: {str(e)}")
+
+    # El JSON malformado ya se resuelve como 400 dentro de
+    # process_activity; aquí solo quedan los errores realmente
+    # inesperados, con traceback completo para diagnóstico
+    except PermissionError:
+        return Response(status_code=401)
+    except Exception:
+        logger.exception("Unhandled error processing message")
         return Response(status_code=500)
 
 @app.get("/api/status")
 async def bot_status():
     """Get bot status and configuration info"""
-    return {
-        "bot_name": "MSBot",
-        "status": "running",
-        "handlers": bot_handler.get_registered_handlers(),
-        "environment": settings.environment,
-        "https_enabled": settings.https_enabled
-    }
+    return app.state.status_payload
 
+@lru_cache(maxsize=1)
 def create_ssl_context():
-    """Create SSL context for HTTPS"""
+    """Create SSL context for HTTPS (memoized: PEM parse once per process)"""
     if not settings.https_enabled:
         return None
-        
-    if not os.path.exists(settings.ssl_cert_path) or not os.path.exists(settings.ssl_key_path):
+
+    if not (Path(settings.ssl_cert_path).is_file() and Path(settings.ssl_key_path).is_file()):
         logger.warning("SSL certificates not found. Please run setup_ssl.py to generate them.")
         return None
-    
+
     ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
     ssl_context.load_cert_chain(settings.ssl_cert_path, settings.ssl_key_path)
     return ssl_context
 
-if __name__ == "__main__":
+def serve():
+    """Launch the uvicorn server (shared by main.py and run.py)"""
     logger.info("Starting MSBot server...")
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"HTTPS Enabled: {settings.https_enabled}")
-    
+
     # Create SSL context if HTTPS is enabled
     ssl_context = create_ssl_context()
-    
+
+    # loop="auto" elige uvloop donde está instalado (selector en C) y
+    # cae al loop asyncio puro en Windows, donde uvloop no existe;
+    # httptools reemplaza el parser HTTP h11. reload y workers>1 son
+    # mutuamente excluyentes en uvicorn, así que en desarrollo se
+    # fuerza un solo worker
+    is_dev = settings.environment == "development"
+    workers = 1 if is_dev else settings.workers
+
     if settings.https_enabled and ssl_context:
         logger.info(f"Starting HTTPS server on {settings.host}:{settings.port}")
         uvicorn.run(
@@ -124,7 +195,10 @@ if __name__ == "__main__":
             port=settings.port,
             ssl_keyfile=settings.ssl_key_path,
             ssl_certfile=settings.ssl_cert_path,
-            reload=True if settings.environment == "development" else False
+            loop="auto",
+            http="httptools",
+            workers=workers,
+            reload=is_dev
         )
     else:
         logger.info(f"Starting HTTP server on {settings.host}:{settings.port}")
@@ -132,5 +206,11 @@ if __name__ == "__main__":
             "main:app",
             host=settings.host,
             port=settings.port,
-            reload=True if settings.environment == "development" else False
-        )
\ No newline at end of file
+            loop="auto",
+            http="httptools",
+            workers=workers,
+            reload=is_dev
+        )
+
+if __name__ == "__main__":
+    serve()
\ No newline at end of file
@@ -6,7 +6,6 @@ Script simple para ejecutar el bot sin configuración adicional
 
 import sys
 import os
-import subprocess
 from pathlib import Path
 
 def main():
@@ -16,8 +15,8 @@ def main():
     script_dir = Path(__file__).parent
     os.chdir(script_dir)
     
-    # Verificar configuración básica
-    if not os.path.exists(".env"):
+    # Verificar configuración básica (un solo stat, sin pasar por os.path)
+    if not Path(".env").is_file():
         print("❌ Archivo .env no encontrado")
         print("Copia .env.example a .env y configura las variables necesarias")
         sys.exit(1)
@@ -25,14 +24,16 @@ def main():
     print("🤖 Iniciando MSBot...")
     
     try:
-        # Ejecutar main.py directamente
-        subprocess.run([sys.executable, "main.py"], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error ejecutando MSBot: {e}")
-        sys.exit(1)
+        # Lanzar el servidor en este mismo proceso: sin fork+exec de un
+        # segundo intérprete ni re-importación duplicada de dependencias
+        from main import serve
+        serve()
     except KeyboardInterrupt:
         print("\n👋 MSBot detenido por usuario")
         sys.exit(0)
+    except Exception as e:
+        print(f"❌ Error ejecutando MSBot: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
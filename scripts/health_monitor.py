@@ -4,13 +4,23 @@ MSBot Health Monitor
 Monitorea la salud del bot y genera reportes de estado
 """
 
+import os
 import time
-import json
-import requests
+import asyncio
+import httpx
 import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+import json
 import argparse
 import signal
+import struct
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, Optional
@@ -23,20 +33,96 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Timeouts con la mitad de connect corta: un host muerto falla en 2s en
+# lugar de agotar el timeout de lectura completo, así las fallas
+# consecutivas cruzan el umbral de alerta antes
+_ROOT_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+_STATUS_TIMEOUT = httpx.Timeout(5.0, connect=2.0)
+
+# Registro binario por check: (epoch f64, is_healthy u8, resp_ms f32,
+# status_code i16) little-endian — 15 bytes append-only por probe
+_HIST_RECORD = struct.Struct("<dBfh")
+
+# Plantilla de alerta en estilo %: logging difiere el formateo hasta
+# saber que el handler realmente va a emitir el registro
+_ALERT_TEMPLATE = (
+    "🚨 ALERTA MSBot 🚨\n"
+    "El bot ha fallado %d veces consecutivas\n"
+    "Último error: %s\n"
+    "Timestamp: %s\n"
+    "URL: %s\n"
+)
+
+# TTL del bot_info cacheado cuando el servidor no emite ETag: la info de
+# /api/status (handlers, versión) casi nunca cambia entre probes
+_STATUS_CACHE_TTL = 300
+
+def _json_indent_bytes(obj) -> bytes:
+    """Serializar con indentación; orjson (C) si está disponible"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+def _json_bytes(obj) -> bytes:
+    """Serializar compacto (sin indentación) para el reporte en disco"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+# slots: sin __dict__ por instancia, relevante con 1440 entradas en el
+# buffer de 24h; frozen porque un estado medido nunca se muta
+@dataclass(slots=True, frozen=True)
 class HealthStatus:
     """Estado de salud del bot"""
-    timestamp: str
+    timestamp_epoch: float
     is_healthy: bool
     response_time_ms: float
     status_code: Optional[int] = None
     error_message: Optional[str] = None
     bot_info: Optional[Dict[str, Any]] = None
 
+    @property
+    def timestamp(self) -> str:
+        """Timestamp ISO, formateado solo cuando alguien lo consulta"""
+        return datetime.fromtimestamp(self.timestamp_epoch).isoformat(timespec="seconds")
+
 class HealthMonitor:
     """Monitor de salud para MSBot"""
-    
-    def __init__(self, 
+
+    __slots__ = (
+        "base_url",
+        "check_interval",
+        "alert_threshold",
+        "report_file",
+        "consecutive_failures",
+        "total_checks",
+        "total_failures",
+        "running",
+        "client",
+        "max_history",
+        "health_history",
+        "_healthy_in_window",
+        "_resp_time_sum",
+        "_resp_time_count",
+        "_last_failure_ts",
+        "_checks_since_save",
+        "_status_etag",
+        "_cached_bot_info",
+        "_bot_info_expiry",
+        "_stop_event",
+        "_report_cache",
+        "_report_version",
+        "_last_reported_version",
+        "_hist_fp",
+        "_hist_since_flush",
+        "_save_every",
+        "_summary_every",
+        "_checks_since_summary",
+        "_save_pool",
+        "_save_pending",
+    )
+
+    def __init__(self,
                  base_url: str = "https://localhost:3978",
                  check_interval: int = 60,
                  alert_threshold: int = 3,
@@ -59,91 +145,182 @@ class HealthMonitor:
         self.total_checks = 0
         self.total_failures = 0
         self.running = True
+
+        # Cliente async con keep-alive: los dos probes de cada ciclo se
+        # multiplexan como streams HTTP/2 sobre una única conexión TLS
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=4),
+            verify=False,  # Certificados auto-firmados en desarrollo
+            http2=True
+        )
         
-        # Histórico de estados (últimas 24 horas)
-        self.health_history = []
-        self.max_history = 24 * 60 // (check_interval // 60)  # Entradas por 24h
-        
-        # Configurar signal handlers
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
-    
-    def _signal_handler(self, signum, frame):
+        # Histórico de estados (últimas 24 horas). deque(maxlen) expulsa
+        # el más antiguo en O(1) en lugar del pop(0) O(n) de una lista
+        self.max_history = max(1, 24 * 3600 // check_interval)  # Entradas por 24h
+        self.health_history = deque(maxlen=self.max_history)
+
+        # Agregados incrementales de la ventana: el reporte se genera en
+        # O(1) en lugar de re-escanear todo el histórico en cada llamada
+        self._healthy_in_window = 0
+        self._resp_time_sum = 0.0
+        self._resp_time_count = 0
+        self._last_failure_ts = None
+
+        # Cadencias precalculadas: contadores simples en el bucle en
+        # lugar de recomputar divisiones/módulos en cada iteración
+        self._save_every = 100
+        self._summary_every = max(1, 3600 // check_interval)
+        self._checks_since_save = 0
+        self._checks_since_summary = 0
+
+        # Los guardados periódicos corren en un worker aparte para que
+        # un disco lento no retrase el siguiente probe; si hay un save
+        # en vuelo, el nuevo se descarta (coalescing)
+        self._save_pool = ThreadPoolExecutor(max_workers=1)
+        self._save_pending = None
+
+        # Cache condicional de /api/status: ETag si el servidor lo
+        # emite, TTL corto como fallback
+        self._status_etag = None
+        self._cached_bot_info = None
+        self._bot_info_expiry = 0.0
+
+        # Memoización del reporte: el shutdown llama a save_report y
+        # print_status_summary seguidos; sin checks nuevos entre medias
+        # el reporte se reusa en lugar de regenerarse
+        self._report_cache = None
+        self._report_version = 0
+        self._last_reported_version = -1
+
+        # Log binario append-only del histórico crudo: O(1) por check,
+        # frente al reporte JSON que se reescribe completo cada vez
+        self._hist_fp = open(
+            self.report_file.with_name("health_history.bin"),
+            "ab",
+            buffering=64 * 1024
+        )
+        self._hist_since_flush = 0
+
+        # Señal de parada: run() espera sobre este evento en lugar de un
+        # sleep bloqueante, así una señal despierta el bucle al instante
+        self._stop_event = asyncio.Event()
+
+    def _request_shutdown(self, signum):
         """Manejador de señales para cierre limpio"""
         logger.info(f"Señal recibida ({signum}), cerrando monitor...")
         self.running = False
-    
-    def check_health(self) -> HealthStatus:
+        self._stop_event.set()
+
+    async def _wait_next_check(self):
+        """Esperar el intervalo o hasta que llegue la señal de parada"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=self.check_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def check_health(self) -> HealthStatus:
         """
         Verificar salud del bot
-        
+
         Returns:
             Estado de salud
         """
-        start_time = time.time()
-        timestamp = datetime.now().isoformat()
-        
-        try:
-            # Verificar endpoint principal
-            response = requests.get(
-                f"{self.base_url}/",
-                timeout=10,
-                verify=False  # Para certificados auto-firmados en desarrollo
+        # monotonic_ns para el tiempo transcurrido: inmune a saltos del
+        # reloj de pared (NTP); el ISO del timestamp se formatea lazy en
+        # la property solo cuando un reporte o alerta lo necesita
+        start_ns = time.monotonic_ns()
+        timestamp_epoch = time.time()
+
+        # Con bot_info cacheado y vigente (y sin ETag con el que hacer
+        # un GET condicional) el probe de status se omite por completo
+        use_cached_status = (
+            self._status_etag is None
+            and self._cached_bot_info is not None
+            and timestamp_epoch < self._bot_info_expiry
+        )
+
+        if use_cached_status:
+            status_response = None
+            try:
+                response = await self.client.get(f"{self.base_url}/", timeout=_ROOT_TIMEOUT)
+            except Exception as e:
+                response = e
+        else:
+            status_headers = (
+                {"If-None-Match": self._status_etag} if self._status_etag else {}
             )
-            
-            response_time = (time.time() - start_time) * 1000
-            
-            if response.status_code == 200:
-                # Obtener información adicional del bot
-                try:
-                    status_response = requests.get(
-                        f"{self.base_url}/api/status",
-                        timeout=5,
-                        verify=False
-                    )
-                    bot_info = status_response.json() if status_response.status_code == 200 else None
-                except:
-                    bot_info = None
-                
-                return HealthStatus(
-                    timestamp=timestamp,
-                    is_healthy=True,
-                    response_time_ms=response_time,
-                    status_code=response.status_code,
-                    bot_info=bot_info
-                )
+            # Ambos probes en paralelo: la latencia del ciclo es la del
+            # endpoint más lento en lugar de la suma de ambos
+            response, status_response = await asyncio.gather(
+                self.client.get(f"{self.base_url}/", timeout=_ROOT_TIMEOUT),
+                self.client.get(
+                    f"{self.base_url}/api/status",
+                    timeout=_STATUS_TIMEOUT,
+                    headers=status_headers
+                ),
+                return_exceptions=True
+            )
+
+        response_time = (time.monotonic_ns() - start_ns) / 1e6
+
+        if isinstance(response, Exception):
+            if isinstance(response, httpx.TimeoutException):
+                error_message = "Timeout"
+            elif isinstance(response, httpx.ConnectError):
+                error_message = "Connection Error"
             else:
-                return HealthStatus(
-                    timestamp=timestamp,
-                    is_healthy=False,
-                    response_time_ms=response_time,
-                    status_code=response.status_code,
-                    error_message=f"HTTP {response.status_code}"
-                )
-                
-        except requests.exceptions.Timeout:
-            response_time = (time.time() - start_time) * 1000
+                error_message = str(response)
             return HealthStatus(
-                timestamp=timestamp,
+                timestamp_epoch=timestamp_epoch,
                 is_healthy=False,
                 response_time_ms=response_time,
-                error_message="Timeout"
+                error_message=error_message
             )
-        except requests.exceptions.ConnectionError:
-            response_time = (time.time() - start_time) * 1000
+
+        if response.status_code == 200:
+            # Obtener información adicional del bot
+            try:
+                if use_cached_status:
+                    bot_info = self._cached_bot_info
+                elif isinstance(status_response, Exception):
+                    bot_info = None
+                elif status_response.status_code == 304:
+                    # No cambió desde el último ETag: reusar el cacheado
+                    bot_info = self._cached_bot_info
+                elif status_response.status_code == 200:
+                    # Decodificar desde los bytes crudos con orjson en
+                    # lugar del parser stdlib de .json()
+                    bot_info = (
+                        orjson.loads(status_response.content)
+                        if orjson is not None
+                        else status_response.json()
+                    )
+                    self._status_etag = status_response.headers.get("ETag")
+                    self._cached_bot_info = bot_info
+                    self._bot_info_expiry = timestamp_epoch + _STATUS_CACHE_TTL
+                else:
+                    bot_info = None
+            # Solo errores de red/decodificación: un except desnudo
+            # también tragaría KeyboardInterrupt/SystemExit y retrasaría
+            # el cierre del monitor
+            except (httpx.HTTPError, ValueError) as e:
+                bot_info = None
+                logger.debug("status fetch failed: %s", e)
+
             return HealthStatus(
-                timestamp=timestamp,
-                is_healthy=False,
+                timestamp_epoch=timestamp_epoch,
+                is_healthy=True,
                 response_time_ms=response_time,
-                error_message="Connection Error"
+                status_code=response.status_code,
+                bot_info=bot_info
             )
-        except Exception as e:
-            response_time = (time.time() - start_time) * 1000
+        else:
             return HealthStatus(
-                timestamp=timestamp,
+                timestamp_epoch=timestamp_epoch,
                 is_healthy=False,
                 response_time_ms=response_time,
-                error_message=str(e)
+                status_code=response.status_code,
+                error_message=f"HTTP {response.status_code}"
             )
     
     def process_health_status(self, status: HealthStatus):
@@ -154,30 +331,75 @@ class HealthMonitor:
             status: Estado de salud
         """
         self.total_checks += 1
-        
-        # Agregar al histórico
-        self.health_history.append(status)
-        if len(self.health_history) > self.max_history:
-            self.health_history.pop(0)
-        
+
+        # Agregar al histórico manteniendo los agregados de la ventana
+        self._push(status)
+
+        # Formateo %-style diferido: logging solo construye el mensaje
+        # si el nivel está habilitado, y esto corre en cada probe
         if status.is_healthy:
             if self.consecutive_failures > 0:
-                logger.info(f"Bot recovered after {self.consecutive_failures} failures")
+                logger.info("Bot recovered after %d failures", self.consecutive_failures)
             self.consecutive_failures = 0
-            logger.info(f"Bot healthy - response time: {status.response_time_ms:.1f}ms")
+            logger.info("Bot healthy - response time: %.1fms", status.response_time_ms)
         else:
             self.consecutive_failures += 1
             self.total_failures += 1
-            
+
             logger.warning(
-                f"Bot unhealthy ({self.consecutive_failures}/{self.alert_threshold}) - "
-                f"Error: {status.error_message}"
+                "Bot unhealthy (%d/%d) - Error: %s",
+                self.consecutive_failures,
+                self.alert_threshold,
+                status.error_message
             )
             
             # Generar alerta si se alcanza el umbral
             if self.consecutive_failures >= self.alert_threshold:
                 self._generate_alert(status)
     
+    def _push(self, status: HealthStatus):
+        """
+        Añadir un estado al histórico actualizando los agregados
+
+        Antes de que maxlen expulse la entrada más antigua se resta su
+        contribución, de modo que los contadores siempre reflejan la
+        ventana actual.
+
+        Args:
+            status: Estado de salud
+        """
+        self._report_version += 1
+
+        # Registro crudo en el log binario; el buffer de 64 KiB coalesce
+        # las escrituras y el flush explícito acota la pérdida ante crash
+        self._hist_fp.write(_HIST_RECORD.pack(
+            status.timestamp_epoch,
+            status.is_healthy,
+            status.response_time_ms,
+            status.status_code or 0
+        ))
+        self._hist_since_flush += 1
+        if self._hist_since_flush >= 100:
+            self._hist_since_flush = 0
+            self._hist_fp.flush()
+
+        history = self.health_history
+        if len(history) == self.max_history:
+            evicted = history[0]
+            if evicted.is_healthy:
+                self._healthy_in_window -= 1
+                self._resp_time_sum -= evicted.response_time_ms
+                self._resp_time_count -= 1
+
+        history.append(status)
+
+        if status.is_healthy:
+            self._healthy_in_window += 1
+            self._resp_time_sum += status.response_time_ms
+            self._resp_time_count += 1
+        else:
+            self._last_failure_ts = status.timestamp
+
     def _generate_alert(self, status: HealthStatus):
         """
         Generar alerta por bot inactivo
@@ -185,19 +407,18 @@ class HealthMonitor:
         Args:
             status: Estado de salud actual
         """
-        alert_message = (
-            f"🚨 ALERTA MSBot 🚨\n"
-            f"El bot ha fallado {self.consecutive_failures} veces consecutivas\n"
-            f"Último error: {status.error_message}\n"
-            f"Timestamp: {status.timestamp}\n"
-            f"URL: {self.base_url}\n"
+        alert_args = (
+            self.consecutive_failures,
+            status.error_message,
+            status.timestamp,
+            self.base_url
         )
-        
-        logger.error(alert_message)
-        
+
+        logger.error(_ALERT_TEMPLATE, *alert_args)
+
         # Aquí puedes agregar lógica para enviar alertas
         # Por ejemplo: email, Slack, webhook, etc.
-        self._send_alert_notification(alert_message)
+        self._send_alert_notification(_ALERT_TEMPLATE % alert_args)
     
     def _send_alert_notification(self, message: str):
         """
@@ -226,26 +447,27 @@ class HealthMonitor:
         """
         if not self.health_history:
             return {"error": "No hay datos de salud disponibles"}
-        
-        # Calcular métricas
-        healthy_checks = sum(1 for h in self.health_history if h.is_healthy)
+
+        # Reusar el último reporte si no entraron checks nuevos
+        if self._last_reported_version == self._report_version:
+            return self._report_cache
+
+        # Métricas desde los agregados incrementales de la ventana
+        healthy_checks = self._healthy_in_window
         total_in_history = len(self.health_history)
         uptime_percentage = (healthy_checks / total_in_history) * 100 if total_in_history > 0 else 0
-        
+
         # Tiempo de respuesta promedio (solo checks exitosos)
-        response_times = [h.response_time_ms for h in self.health_history if h.is_healthy]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        
+        avg_response_time = (
+            self._resp_time_sum / self._resp_time_count if self._resp_time_count else 0
+        )
+
         # Último estado
         last_status = self.health_history[-1]
-        
-        # Tiempo desde último fallo
-        last_failure = None
-        for status in reversed(self.health_history):
-            if not status.is_healthy:
-                last_failure = status.timestamp
-                break
-        
+
+        # Último fallo registrado
+        last_failure = self._last_failure_ts
+
         report = {
             "report_timestamp": datetime.now().isoformat(),
             "monitoring_period_hours": self.max_history * (self.check_interval / 3600),
@@ -266,15 +488,21 @@ class HealthMonitor:
             "last_failure": last_failure,
             "bot_info": last_status.bot_info if last_status.is_healthy else None
         }
-        
+
+        self._report_cache = report
+        self._last_reported_version = self._report_version
         return report
     
     def save_report(self):
         """Guardar reporte de salud en archivo"""
         try:
             report = self.generate_report()
-            with open(self.report_file, 'w') as f:
-                json.dump(report, f, indent=2)
+            # Escritura atómica: tmp + os.replace evita que un lector
+            # vea un reporte a medio escribir; sin indentación para no
+            # pretty-printear cada entrada en corridas largas
+            tmp = self.report_file.with_suffix(".tmp")
+            tmp.write_bytes(_json_bytes(report))
+            os.replace(tmp, self.report_file)
             logger.info(f"Reporte guardado en {self.report_file}")
         except Exception as e:
             logger.error(f"Error guardando reporte: {e}")
@@ -302,38 +530,57 @@ class HealthMonitor:
         
         print("="*50)
     
-    def run(self):
+    async def run(self):
         """Ejecutar monitor en bucle continuo"""
         logger.info(f"Iniciando health monitor para {self.base_url}")
         logger.info(f"Intervalo: {self.check_interval}s, Umbral alerta: {self.alert_threshold}")
-        
+
+        # Señales registradas en el propio loop: el handler corre como
+        # callback async en lugar de interrumpir bytecode arbitrario
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._request_shutdown, sig)
+            except NotImplementedError:
+                # Windows: el loop Proactor no soporta add_signal_handler
+                signal.signal(sig, lambda s, f: self._request_shutdown(s))
+
         while self.running:
             try:
                 # Verificar salud
-                status = self.check_health()
+                status = await self.check_health()
                 self.process_health_status(status)
-                
-                # Guardar reporte cada 10 checks
-                if self.total_checks % 10 == 0:
-                    self.save_report()
-                
+
+                # Guardar reporte cada N checks: el flush a disco se
+                # amortiza y el cierre limpio escribe el estado final
+                self._checks_since_save += 1
+                if self._checks_since_save >= self._save_every:
+                    self._checks_since_save = 0
+                    if self._save_pending is None or self._save_pending.done():
+                        self._save_pending = self._save_pool.submit(self.save_report)
+
                 # Mostrar resumen cada hora
-                if self.total_checks % (3600 // self.check_interval) == 0:
+                self._checks_since_summary += 1
+                if self._checks_since_summary >= self._summary_every:
+                    self._checks_since_summary = 0
                     self.print_status_summary()
-                
-                # Esperar siguiente check
-                time.sleep(self.check_interval)
-                
+
+                # Esperar siguiente check (o la señal de parada)
+                await self._wait_next_check()
+
             except KeyboardInterrupt:
                 logger.info("Monitor interrumpido por usuario")
                 break
             except Exception as e:
                 logger.error(f"Error en monitor: {e}")
-                time.sleep(self.check_interval)
-        
-        # Guardar reporte final
+                await self._wait_next_check()
+
+        # Drenar cualquier guardado en vuelo y escribir el estado final
+        self._save_pool.shutdown(wait=True)
         self.save_report()
         self.print_status_summary()
+        self._hist_fp.close()
+        await self.client.aclose()
         logger.info("Health monitor terminado")
 
 def main():
@@ -361,13 +608,18 @@ def main():
     
     if args.single_check:
         # Ejecutar un solo check
-        status = monitor.check_health()
-        print(json.dumps(asdict(status), indent=2))
+        async def single_check():
+            status = await monitor.check_health()
+            await monitor.client.aclose()
+            return status
+
+        status = asyncio.run(single_check())
+        print(_json_indent_bytes(asdict(status)).decode())
         print(f"\nBot {'saludable' if status.is_healthy else 'no saludable'}")
         sys.exit(0 if status.is_healthy else 1)
     else:
         # Ejecutar monitor continuo
-        monitor.run()
+        asyncio.run(monitor.run())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,6 +5,7 @@ Script para configurar usuarios autorizados fácilmente
 """
 
 import os
+import re
 import json
 import sys
 from pathlib import Path
@@ -126,26 +127,27 @@ def update_env_file(admin_id: str, admin_email: str):
         return
     
     try:
-        # Leer archivo .env
-        with open(env_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Actualizar líneas
-        updated = False
-        for i, line in enumerate(lines):
-            if line.startswith("DEFAULT_ADMIN_USER_ID="):
-                lines[i] = f"DEFAULT_ADMIN_USER_ID={admin_id}\n"
-                updated = True
-            elif line.startswith("DEFAULT_ADMIN_EMAIL="):
-                lines[i] = f"DEFAULT_ADMIN_EMAIL={admin_email}\n"
-                updated = True
-        
+        # Una sola pasada sobre el texto completo con regex compilada en
+        # C, en lugar de readlines + startswith línea a línea
+        text = env_file.read_text()
+        updated_text = re.sub(
+            r'^DEFAULT_ADMIN_USER_ID=.*$',
+            f'DEFAULT_ADMIN_USER_ID={admin_id}',
+            text,
+            flags=re.MULTILINE
+        )
+        updated_text = re.sub(
+            r'^DEFAULT_ADMIN_EMAIL=.*$',
+            f'DEFAULT_ADMIN_EMAIL={admin_email}',
+            updated_text,
+            flags=re.MULTILINE
+        )
+
         # Guardar archivo actualizado
-        if updated:
-            with open(env_file, 'w') as f:
-                f.writelines(lines)
+        if updated_text != text:
+            env_file.write_text(updated_text)
             print("✅ Archivo .env actualizado con admin por defecto")
-        
+
     except Exception as e:
         print(f"⚠️  No se pudo actualizar .env: {e}")
 
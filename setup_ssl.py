@@ -3,58 +3,78 @@ SSL Certificate Generator for Local Development
 Generates self-signed certificates for HTTPS local server
 """
 
-import os
-import subprocess
 import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 def create_ssl_certificates():
     """Generate self-signed SSL certificates for local development"""
-    
+
     # Create certs directory
     certs_dir = Path("./certs")
     certs_dir.mkdir(exist_ok=True)
-    
+
     cert_path = certs_dir / "cert.pem"
     key_path = certs_dir / "key.pem"
-    
+
     # Check if certificates already exist
     if cert_path.exists() and key_path.exists():
         print("✅ SSL certificates already exist")
         return True
-    
+
     print("🔐 Generating SSL certificates for local development...")
-    
+
+    # The cryptography library generates the key and certificate
+    # in-process: no openssl binary on PATH, no subprocess spawn
     try:
-        # Generate private key and certificate
-        cmd = [
-            "openssl", "req", "-x509", "-newkey", "rsa:4096",
-            "-keyout", str(key_path),
-            "-out", str(cert_path),
-            "-days", "365",
-            "-nodes",
-            "-subj", "/C=US/ST=State/L=City/O=Organization/CN=localhost"
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ SSL certificates generated successfully!")
-            print(f"   Certificate: {cert_path}")
-            print(f"   Private Key: {key_path}")
-            print("\n⚠️  Note: These are self-signed certificates for development only.")
-            print("   Your browser will show a security warning - this is normal.")
-            return True
-        else:
-            print(f"❌ Error generating certificates: {result.stderr}")
-            return False
-            
-    except FileNotFoundError:
-        print("❌ OpenSSL not found. Please install OpenSSL:")
-        print("   - Windows: Download from https://slproweb.com/products/Win32OpenSSL.html")
-        print("   - macOS: brew install openssl")
-        print("   - Linux: sudo apt-get install openssl (Ubuntu/Debian)")
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+    except ImportError:
+        print("❌ cryptography library not found. Install it with:")
+        print("   pip install cryptography")
         return False
+
+    try:
+        # 2048 bits is plenty for a localhost dev cert and generates
+        # much faster than 4096
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+        subject = issuer = x509.Name([
+            x509.NameAttribute(NameOID.COUNTRY_NAME, "US"),
+            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, "State"),
+            x509.NameAttribute(NameOID.LOCALITY_NAME, "City"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "Organization"),
+            x509.NameAttribute(NameOID.COMMON_NAME, "localhost"),
+        ])
+
+        now = datetime.now(timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(subject)
+            .issuer_name(issuer)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now)
+            .not_valid_after(now + timedelta(days=365))
+            .sign(key, hashes.SHA256())
+        )
+
+        key_path.write_bytes(key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption(),
+        ))
+        cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+
+        print("✅ SSL certificates generated successfully!")
+        print(f"   Certificate: {cert_path}")
+        print(f"   Private Key: {key_path}")
+        print("\n⚠️  Note: These are self-signed certificates for development only.")
+        print("   Your browser will show a security warning - this is normal.")
+        return True
+
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         return False